@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+"""
+Compile .env into _env_cache.py
+
+Run after editing .env (the deploy scripts do this automatically). The
+generated module is imported by config.py, so later service starts load
+the values from cached bytecode instead of re-parsing .env. The cache
+records the .env modification time and is ignored once .env changes.
+"""
+
+import os
+from dotenv import dotenv_values
+
+SERVICE_DIR = os.path.dirname(os.path.abspath(__file__))
+ENV_PATH = os.path.join(SERVICE_DIR, '.env')
+CACHE_PATH = os.path.join(SERVICE_DIR, '_env_cache.py')
+
+
+def compile_env(env_path=ENV_PATH, cache_path=CACHE_PATH):
+    """Write the values of env_path to cache_path as a Python module"""
+    values = {key: value for key, value in dotenv_values(env_path).items() if value is not None}
+    mtime_ns = os.stat(env_path).st_mtime_ns
+
+    lines = [
+        "# Generated by compile_env.py - do not edit, re-run compile_env.py instead",
+        f"ENV_MTIME_NS = {mtime_ns!r}",
+        "VALUES = {",
+    ]
+    lines.extend(f"    {key!r}: {value!r}," for key, value in values.items())
+    lines.append("}")
+
+    tmp_path = cache_path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write("\n".join(lines) + "\n")
+    os.replace(tmp_path, cache_path)
+    return len(values)
+
+
+if __name__ == "__main__":
+    if not os.path.exists(ENV_PATH):
+        print(f"No .env found at {ENV_PATH} - nothing to compile")
+        raise SystemExit(1)
+    count = compile_env()
+    print(f"Compiled {count} settings from {ENV_PATH} into {CACHE_PATH}")
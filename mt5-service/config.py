@@ -1,53 +1,164 @@
 import os
+import functools
+from dataclasses import fields, make_dataclass
 from dotenv import load_dotenv
 
+__all__ = ['Config', 'Settings', 'CONFIG', 'load_env']
+
+ENV_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.env')
+
+
+def _load_env_cache():
+    """Apply the values precompiled by compile_env.py, if still current"""
+    try:
+        import _env_cache
+        if os.stat(ENV_PATH).st_mtime_ns != _env_cache.ENV_MTIME_NS:
+            return False  # .env was edited after the cache was compiled
+    except (ImportError, OSError, AttributeError):
+        return False
+
+    # Same precedence as load_dotenv(): real environment variables win
+    for key, value in _env_cache.VALUES.items():
+        os.environ.setdefault(key, value)
+    return True
+
+
+@functools.cache
+def load_env():
+    """Parse the .env file once per process.
+
+    Every importer shares the same parse; edits to .env only take effect
+    after the service is restarted.
+    """
+    if not _load_env_cache():
+        load_dotenv()
+
+
 # Load environment variables
-load_dotenv()
+load_env()
+
+# One snapshot of the process environment; settings are plain dict lookups
+_env = dict(os.environ)
+
+
+def _login(value) -> int:
+    """Parse MT5_LOGIN, treating empty or non-numeric values as unset"""
+    value = value.strip()
+    return int(value) if value.isdigit() else 0
+
+
+_TRUE = frozenset({'1', 'true', 'yes', 'on', 't', 'y'})
+
+
+def _workers(value) -> int:
+    """Parse MT5_WORKERS; at least one worker, or queued signals would never execute"""
+    return max(1, int(value))
+
+
+def _flag(value) -> bool:
+    """Parse a boolean setting; accepts the common truthy spellings"""
+    return value.strip().lower() in _TRUE
+
+
+class _LazyEnv:
+    """Class attribute read from the environment on first access.
+
+    The parsed value replaces the descriptor on the owning class, so only
+    the first read pays for the lookup and settings a run never touches
+    are never parsed.
+    """
+
+    def __init__(self, key, default=None, cast=None):
+        self.key = key
+        self.default = default
+        self.cast = cast
+
+    def __set_name__(self, owner, name):
+        self.name = name
+    
+    @property
+    def type(self):
+        """The parsed value's type, for the Settings annotation"""
+        if self.cast is None:
+            return str if self.default is not None else str | None
+        if isinstance(self.cast, type):
+            return self.cast
+        return self.cast.__annotations__['return']
+
+    def __get__(self, obj, owner):
+        value = _env.get(self.key, self.default)
+        if self.cast is not None and value is not None:
+            value = self.cast(value)
+        setattr(owner, self.name, value)
+        return value
+
 
 class Config:
     # MT5 Settings
     # Handle empty string values gracefully
-    _mt5_login_str = os.getenv('MT5_LOGIN', '0').strip()
-    MT5_LOGIN = int(_mt5_login_str) if _mt5_login_str and _mt5_login_str.isdigit() else 0
-    MT5_PASSWORD = os.getenv('MT5_PASSWORD', '')
-    MT5_SERVER = os.getenv('MT5_SERVER', '')
+    MT5_LOGIN = _LazyEnv('MT5_LOGIN', '0', _login)
+    MT5_PASSWORD = _LazyEnv('MT5_PASSWORD', '')
+    MT5_SERVER = _LazyEnv('MT5_SERVER', '')
     
     # Connection Settings
-    DO_SERVER_IP = os.getenv('DO_SERVER_IP')
-    REDIS_URL = os.getenv('REDIS_URL')
-    RABBITMQ_URL = os.getenv('RABBITMQ_URL')
+    DO_SERVER_IP = _LazyEnv('DO_SERVER_IP')
+    REDIS_URL = _LazyEnv('REDIS_URL')
+    RABBITMQ_URL = _LazyEnv('RABBITMQ_URL')
     
     # Service Settings
-    SERVICE_NAME = os.getenv('SERVICE_NAME', 'NightTrader-MT5')
-    LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO')
+    SERVICE_NAME = _LazyEnv('SERVICE_NAME', 'NightTrader-MT5')
+    LOG_LEVEL = _LazyEnv('LOG_LEVEL', 'INFO')
     
     # Trading Mode Settings
-    SINGLE_TRADE_MODE = os.getenv('SINGLE_TRADE_MODE', 'true').lower() == 'true'  # Default: True
-    CLOSE_OPPOSITE_POSITIONS = os.getenv('CLOSE_OPPOSITE_POSITIONS', 'false').lower() == 'true'  # Default: False
+    SINGLE_TRADE_MODE = _LazyEnv('SINGLE_TRADE_MODE', 'true', _flag)  # Default: True
+    CLOSE_OPPOSITE_POSITIONS = _LazyEnv('CLOSE_OPPOSITE_POSITIONS', 'false', _flag)  # Default: False
+    SIGNAL_MAX_AGE = _LazyEnv('SIGNAL_MAX_AGE', '5', float)  # Signals older than this (seconds) are dropped
+    MT5_WORKERS = _LazyEnv('MT5_WORKERS', '1', _workers)  # Threads executing signals concurrently
+    SYMBOL_GROUP = _LazyEnv('SYMBOL_GROUP', '')  # MT5 group filter for the symbol map, e.g. *USD*,*XAU*; empty maps all
     
     # Webhook Configuration
-    WEBHOOK_SECRET = os.getenv('WEBHOOK_SECRET')
-    WEBHOOK_TOKEN = os.getenv('WEBHOOK_TOKEN')  # VPS-specific webhook token
+    WEBHOOK_SECRET = _LazyEnv('WEBHOOK_SECRET')
+    WEBHOOK_TOKEN = _LazyEnv('WEBHOOK_TOKEN')  # VPS-specific webhook token
     
     # Queue Configuration
-    RABBITMQ_QUEUE_NAME = os.getenv('RABBITMQ_QUEUE_NAME', 'mt5_signals')  # VPS-specific queue
+    RABBITMQ_QUEUE_NAME = _LazyEnv('RABBITMQ_QUEUE_NAME', 'mt5_signals')  # VPS-specific queue
     
     # Infrastructure Credentials (NEW - for security)
-    RABBITMQ_USER = os.getenv('RABBITMQ_USER', 'nighttrader')
-    RABBITMQ_PASSWORD = os.getenv('RABBITMQ_PASSWORD')
-    REDIS_PASSWORD = os.getenv('REDIS_PASSWORD')
+    RABBITMQ_USER = _LazyEnv('RABBITMQ_USER', 'nighttrader')
+    RABBITMQ_PASSWORD = _LazyEnv('RABBITMQ_PASSWORD')
+    REDIS_PASSWORD = _LazyEnv('REDIS_PASSWORD')
     
     # RabbitMQ Connection Parameters
-    RABBITMQ_HEARTBEAT = int(os.getenv('RABBITMQ_HEARTBEAT', '60'))  # Heartbeat interval in seconds
-    RABBITMQ_BLOCKED_CONNECTION_TIMEOUT = int(os.getenv('RABBITMQ_BLOCKED_CONNECTION_TIMEOUT', '300'))  # 5 minutes
-    RABBITMQ_CONNECTION_ATTEMPTS = int(os.getenv('RABBITMQ_CONNECTION_ATTEMPTS', '3'))
-    RABBITMQ_RETRY_DELAY = int(os.getenv('RABBITMQ_RETRY_DELAY', '5'))  # Initial retry delay in seconds
-    RABBITMQ_MAX_RETRY_DELAY = int(os.getenv('RABBITMQ_MAX_RETRY_DELAY', '60'))  # Max retry delay
-    RABBITMQ_SOCKET_TIMEOUT = float(os.getenv('RABBITMQ_SOCKET_TIMEOUT', '10.0'))  # Socket timeout
+    RABBITMQ_HEARTBEAT = _LazyEnv('RABBITMQ_HEARTBEAT', '60', int)  # Heartbeat interval in seconds
+    RABBITMQ_BLOCKED_CONNECTION_TIMEOUT = _LazyEnv('RABBITMQ_BLOCKED_CONNECTION_TIMEOUT', '300', int)  # 5 minutes
+    RABBITMQ_CONNECTION_ATTEMPTS = _LazyEnv('RABBITMQ_CONNECTION_ATTEMPTS', '3', int)
+    RABBITMQ_RETRY_DELAY = _LazyEnv('RABBITMQ_RETRY_DELAY', '5', int)  # Initial retry delay in seconds
+    RABBITMQ_MAX_RETRY_DELAY = _LazyEnv('RABBITMQ_MAX_RETRY_DELAY', '60', int)  # Max retry delay
+    RABBITMQ_SOCKET_TIMEOUT = _LazyEnv('RABBITMQ_SOCKET_TIMEOUT', '10.0', float)  # Socket timeout
+    RABBITMQ_TCP_KEEPIDLE = _LazyEnv('RABBITMQ_TCP_KEEPIDLE', '120', int)  # Idle seconds before keepalive probes
+    RABBITMQ_TCP_KEEPINTVL = _LazyEnv('RABBITMQ_TCP_KEEPINTVL', '30', int)  # Seconds between probes
+    RABBITMQ_TCP_KEEPCNT = _LazyEnv('RABBITMQ_TCP_KEEPCNT', '10', int)  # Unanswered probes before the socket is dropped
+    RABBITMQ_TCP_USER_TIMEOUT = _LazyEnv('RABBITMQ_TCP_USER_TIMEOUT', '300000', int)  # ms unacknowledged data may wait (5 min)
+    RABBITMQ_PREFETCH = _LazyEnv('RABBITMQ_PREFETCH', '50', int)  # Max unacked deliveries buffered locally
+    RABBITMQ_ACK_BATCH_SIZE = _LazyEnv('RABBITMQ_ACK_BATCH_SIZE', '16', int)  # Acks combined into one multi-ack
+    RABBITMQ_ACK_FLUSH_MS = _LazyEnv('RABBITMQ_ACK_FLUSH_MS', '100', int)  # Max delay before a partial batch is acked
+    
+    # Redis Write Buffering
+    REDIS_POOL_SIZE = _LazyEnv('REDIS_POOL_SIZE', '8', int)  # Max sockets per Redis connection pool
+    REDIS_TCP_KEEPIDLE = _LazyEnv('REDIS_TCP_KEEPIDLE', '30', int)  # Idle seconds before keepalive probes
+    REDIS_TCP_KEEPINTVL = _LazyEnv('REDIS_TCP_KEEPINTVL', '10', int)  # Seconds between probes
+    REDIS_TCP_KEEPCNT = _LazyEnv('REDIS_TCP_KEEPCNT', '3', int)  # Unanswered probes before the socket is dropped
+    REDIS_PIPELINE_SIZE = _LazyEnv('REDIS_PIPELINE_SIZE', '50', int)  # Records sent per pipeline round trip
+    REDIS_FLUSH_MS = _LazyEnv('REDIS_FLUSH_MS', '100', int)  # Max delay before buffered records are written
+    REDIS_BUFFER_SIZE = _LazyEnv('REDIS_BUFFER_SIZE', '10000', int)  # Records kept for retry while Redis is down; the oldest are dropped once full
     
     @classmethod
     def validate(cls):
-        """Validate required configuration"""
+        """Validate required configuration (reads every setting it checks)"""
+        # Deployments that validate .env ahead of time (tools/validate_env.py) can skip this
+        if _env.get('NT_SKIP_VALIDATE') == '1':
+            return True
+        
         if not cls.MT5_LOGIN or not cls.MT5_PASSWORD or not cls.MT5_SERVER:
             raise ValueError("MT5_LOGIN, MT5_PASSWORD, and MT5_SERVER must be set in .env file")
         
@@ -65,4 +176,37 @@ class Config:
         if cls.REDIS_URL or cls.RABBITMQ_URL:
             print("WARNING: REDIS_URL and RABBITMQ_URL are deprecated. Use individual credential environment variables instead.")
         
-        return True
\ No newline at end of file
+        return True
+
+
+def _from_config(cls):
+    """Build a snapshot from the current Config values"""
+    return cls(**{f.name: getattr(Config, f.name) for f in fields(cls)})
+
+
+# Immutable snapshot of Config for hot paths. The fields are generated from the
+# _LazyEnv attributes (read before any of them is replaced by its value), so a new
+# setting only has to be declared on Config.
+Settings = make_dataclass(
+    'Settings',
+    [(name, attr.type) for name, attr in vars(Config).items() if isinstance(attr, _LazyEnv)],
+    namespace={'from_config': classmethod(_from_config)},
+    frozen=True,
+    slots=True,
+)
+Settings.__module__ = __name__
+Settings.__doc__ = """Immutable snapshot of Config for hot paths.
+
+Slot attributes are read at a fixed offset instead of through the class
+__dict__. Use the module-level CONFIG singleton rather than building
+new instances.
+"""
+
+
+def __getattr__(name):
+    # CONFIG is built on first import so that importing config alone stays lazy
+    if name == 'CONFIG':
+        global CONFIG
+        CONFIG = Settings.from_config()
+        return CONFIG
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -7,53 +7,188 @@ MT5 Service v6 - Single Trade Mode with configurable opposite position closing
 
 import MetaTrader5 as mt5
 import pika
-import pika.exceptions
 import redis
 import json
 import time
+import atexit
 import logging
+import logging.handlers
 from datetime import datetime, timezone
 import os
-from dotenv import load_dotenv
-import uuid
-from config import Config
+import random
+import re
 import socket
+import uuid
+import queue
+import collections
+import decimal
+import contextlib
+import threading
+import functools
+from dataclasses import dataclass, fields
+from config import CONFIG
 
-# Load environment
-load_dotenv()
+# orjson parses signal payloads several times faster; the stdlib parser is the fallback
+try:
+    import orjson
+    json_loads = orjson.loads
+except ImportError:
+    json_loads = json.loads
 
 # Setup logging
 log_dir = "C:\\NightTrader\\logs"
 os.makedirs(log_dir, exist_ok=True)
 
+# Records are queued by the calling thread and written to file/console by a
+# listener thread, so disk I/O never delays order execution
+log_formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+log_handlers = [
+    logging.FileHandler(f'{log_dir}/mt5_service.log'),
+    logging.StreamHandler()
+]
+for handler in log_handlers:
+    handler.setFormatter(log_formatter)
+
+log_queue = queue.Queue(-1)
+log_listener = logging.handlers.QueueListener(log_queue, *log_handlers, respect_handler_level=True)
+log_listener.start()
+atexit.register(log_listener.stop)  # Drains queued records on exit
+
+queue_handler = logging.handlers.QueueHandler(log_queue)
+queue_handler.setFormatter(logging.Formatter('%(message)s'))  # Final formatting happens in the listener
+
 logging.basicConfig(
     level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler(f'{log_dir}/mt5_service.log'),
-        logging.StreamHandler()
-    ]
+    handlers=[queue_handler]
 )
 logger = logging.getLogger('MT5Service')
 
+# Broker-specific suffixes a requested symbol may carry (e.g. EURUSD.p, XAUUSDm)
+SYMBOL_SUFFIXES = ('.p', '.s', '.a', 'm')
+SYMBOL_SUFFIX_RE = re.compile('(?:' + '|'.join(map(re.escape, SYMBOL_SUFFIXES)) + ')$')
+
+# Symbols worth listing in the startup log
+NOTABLE_SYMBOL_RE = re.compile(r'EUR|USD|GBP|XAU|OIL')
+
+# How long one positions_get() result is reused (seconds); order sends invalidate it
+POSITIONS_CACHE_TTL = 0.1
+
+# Longest wait between Redis write retries while Redis is unreachable (seconds)
+REDIS_RETRY_MAX_DELAY = 30
+
+# Magic number stamped on our orders; positions without it belong to someone else
+MAGIC_NUMBER = 234000
+
+
+@dataclass(slots=True)
+class TradeRecord:
+    """A placed order, as stored in the Redis trade:<order> hash"""
+    signal_id: str | int  # Whatever id the producer sent (uuid hex when generated)
+    symbol: str
+    requested_symbol: str
+    action: str
+    volume: float
+    price: float
+    timestamp: str
+    webhook_timestamp: str | None = None
+    execution_time_seconds: float | None = None
+    
+    def to_mapping(self):
+        """HSET fields as strings; unset optional fields are left out (redis-py rejects None)"""
+        mapping = {}
+        for name in TRADE_RECORD_FIELDS:
+            value = getattr(self, name)
+            if value is not None:
+                mapping[name] = str(value)
+        return mapping
+
+
+TRADE_RECORD_FIELDS = tuple(f.name for f in fields(TradeRecord))
+
 class MT5Service:
+    # Fields shared by every position-close order
+    CLOSE_REQUEST_TEMPLATE = {
+        "action": mt5.TRADE_ACTION_DEAL,
+        "deviation": 20,
+        "magic": MAGIC_NUMBER,
+        "type_time": mt5.ORDER_TIME_GTC,
+        "type_filling": mt5.ORDER_FILLING_IOC,
+    }
+    
+    # New-order templates per side; only symbol, volume, price and SL/TP vary per signal
+    BUY_REQUEST_TEMPLATE = {**CLOSE_REQUEST_TEMPLATE, "type": mt5.ORDER_TYPE_BUY, "comment": "NightTrader BUY"}
+    SELL_REQUEST_TEMPLATE = {**CLOSE_REQUEST_TEMPLATE, "type": mt5.ORDER_TYPE_SELL, "comment": "NightTrader SELL"}
+    
     def __init__(self):
         self.mt5_connected = False
         self.rabbitmq_connection = None
         self.rabbitmq_channel = None
         self.redis_client = None
-        self.symbol_map = {}  # Map requested symbols to tradeable ones
+        self.redis_log = None  # Write-only client for trade/closure records (no response decoding)
+        self.redis_pool = None  # Connection pools outlive reconnects; clients are rebuilt on top of them
+        self.redis_log_pool = None
+        self.symbol_map = {}  # Map requested symbols (and their suffix variants) to tradeable ones
+        self.selected_symbols = set()  # Symbols known to be in Market Watch (no symbol_select needed)
+        self.symbol_static = {}  # symbol -> (min steps, max steps, volume_step, step decimals)
+        self.positions_cache = None  # (monotonic fetch time, all open positions)
         self.vps_id = os.getenv('VPS_INSTANCE_ID', 'unknown')  # Unique VPS identifier
-        self.should_stop = False  # Flag for graceful shutdown
-        self.reconnect_delay = Config.RABBITMQ_RETRY_DELAY
+        
+        # Environment is read once here instead of on every (re)connect
+        self.mt5_login = os.getenv('MT5_LOGIN', '').strip()
+        self.mt5_password = os.getenv('MT5_PASSWORD', '').strip()
+        self.mt5_server = os.getenv('MT5_SERVER', '').strip()
+        self.digitalocean_ip = os.getenv('DIGITALOCEAN_DROPLET_IP', os.getenv('DIGITALOCEAN_IP', '138.197.3.109'))
+        self.queue_name = os.getenv('RABBITMQ_QUEUE_NAME', 'mt5_signals')  # VPS-specific or default
+        self.rabbitmq_user = os.getenv('RABBITMQ_USER', 'vps_consumer')  # Read-only consumer
+        self.rabbitmq_password = os.getenv('RABBITMQ_PASSWORD')
+        self.redis_password = os.getenv('REDIS_PASSWORD')
+        
+        # Settings read on every signal or ack are copied onto the instance once
+        self.single_trade_mode = CONFIG.SINGLE_TRADE_MODE
+        self.close_opposite_enabled = CONFIG.CLOSE_OPPOSITE_POSITIONS  # Not close_opposite_positions - that is the method
+        self.signal_max_age = CONFIG.SIGNAL_MAX_AGE
+        # A batch larger than the prefetch window could never fill - the broker stops
+        # delivering first - so every ack would wait for the flush timer
+        self.ack_batch_size = min(CONFIG.RABBITMQ_ACK_BATCH_SIZE, CONFIG.RABBITMQ_PREFETCH)
+        self.ack_flush_delay = CONFIG.RABBITMQ_ACK_FLUSH_MS / 1000  # Seconds, as call_later expects
+        
+        self.stop_event = threading.Event()  # Set for graceful shutdown; also interrupts backoff waits
+        self.reconnect_delay = CONFIG.RABBITMQ_RETRY_DELAY
+        self.consuming = False  # True once basic_consume is active on the current connection
+        # (channel, delivery_tag, body, received_ns) handed to the worker; prefetch already caps unacked
+        # deliveries, so the bound only matters when a reconnect leaves stale items behind
+        self.signal_queue = queue.Queue(maxsize=CONFIG.RABBITMQ_PREFETCH)
+        self.signal_workers = []
+        # Position-dependent modes read positions and then trade, so concurrent workers
+        # must take turns or two signals could both see "no position" and both open one
+        self.order_lock = threading.Lock()
+        self.serialize_signals = self.single_trade_mode or self.close_opposite_enabled
+        self.ack_channel = None  # Channel the pending acks belong to
+        self.pending_ack_tag = 0  # Highest processed delivery tag not yet acknowledged
+        self.pending_ack_count = 0
+        self.ack_floor = 0  # Every delivery tag up to this one is finished
+        self.finished_tags = {}  # Tags finished out of order -> True if they still need an ack
+        self.urgent_tags = set()  # Finished tags that sent an order - acked without waiting for a batch
+        self.worker_state = threading.local()  # Per-worker flag: did the current signal reach order_send
+        self.ack_timer = None
+        # (key, mapping) records waiting for the flusher; bounded so a Redis outage cannot
+        # grow memory without limit - once full, the oldest record is dropped
+        self.redis_buffer = collections.deque(maxlen=CONFIG.REDIS_BUFFER_SIZE)
+        self.redis_buffer_lock = threading.Lock()  # Keeps appends and failed-batch requeues from racing
+        self.trade_log_buffer = collections.deque()  # trade_attempts.log entries waiting for the flusher
+        self.trade_log_fd = None  # Raw append-mode descriptor, kept open for the life of the service
+        self.flush_event = threading.Event()  # Wakes the flusher early when a batch is full
+        self.flusher = None  # Background thread writing buffered Redis records and trade log lines
+        self.redis_pipeline_size = CONFIG.REDIS_PIPELINE_SIZE
+        self.redis_flush_interval = CONFIG.REDIS_FLUSH_MS / 1000
         
     def connect_mt5(self):
         """Initialize and login to MT5"""
         try:
             # Check if MT5 credentials are configured
-            login_str = os.getenv('MT5_LOGIN', '').strip()
-            password = os.getenv('MT5_PASSWORD', '').strip()
-            server = os.getenv('MT5_SERVER', '').strip()
+            login_str = self.mt5_login
+            password = self.mt5_password
+            server = self.mt5_server
             
             if not login_str or login_str == '0' or not password or not server:
                 logger.warning("MT5 credentials not configured. Skipping MT5 connection.")
@@ -91,23 +226,46 @@ class MT5Service:
         """Build mapping of symbols for PU Prime demo"""
         logger.info("Building symbol map...")
         
-        # Get all symbols
-        symbols = mt5.symbols_get()
+        # Let the terminal filter by group; an empty or unmatched group falls back to every symbol
+        symbols = None
+        if CONFIG.SYMBOL_GROUP:
+            symbols = mt5.symbols_get(group=CONFIG.SYMBOL_GROUP)
+            if not symbols:
+                logger.warning(f"No symbols match SYMBOL_GROUP '{CONFIG.SYMBOL_GROUP}' - mapping all symbols")
+        if not symbols:
+            symbols = mt5.symbols_get() or ()
         tradeable_count = 0
+        self.selected_symbols.clear()
+        log_notable = logger.isEnabledFor(logging.INFO)
+        symbol_map = {}
+        tradeable_names = []
         
         for symbol in symbols:
             # Only map visible symbols with full trading
             if symbol.visible and symbol.trade_mode == mt5.SYMBOL_TRADE_MODE_FULL:
+                # One broken symbol must not abort the whole map - leave it out instead
+                if self.cache_volume_limits(symbol) is None:
+                    continue
                 tradeable_count += 1
-                # Create mappings for common variations
-                base_name = symbol.name.replace('.p', '').replace('.s', '').replace('.a', '').replace('m', '')
-                self.symbol_map[base_name] = symbol.name
-                self.symbol_map[symbol.name] = symbol.name  # Direct mapping
+                tradeable_names.append(symbol.name)
+                # Create mappings for common variations - the first symbol to claim an alias keeps it
+                base_name = SYMBOL_SUFFIX_RE.sub('', symbol.name)
+                symbol_map.setdefault(base_name, symbol.name)
+                for suffix in SYMBOL_SUFFIXES:
+                    symbol_map.setdefault(base_name + suffix, symbol.name)
+                # Visible means it is already in Market Watch, so trades never need symbol_select
+                self.selected_symbols.add(symbol.name)
                 
                 # Log important tradeable symbols
-                if any(s in symbol.name for s in ['EUR', 'USD', 'GBP', 'XAU', 'OIL']):
+                if log_notable and NOTABLE_SYMBOL_RE.search(symbol.name):
                     logger.info(f"   Tradeable: {symbol.name}")
         
+        # Direct mappings go in last so a real symbol name always beats an alias
+        # (with EURUSD and EURUSD.p both tradeable, EURUSD must trade EURUSD)
+        for name in tradeable_names:
+            symbol_map[name] = name
+        self.symbol_map = symbol_map
+        
         logger.info(f"Found {tradeable_count} tradeable symbols")
         
         # Log specific mappings
@@ -123,120 +281,149 @@ class MT5Service:
             logger.warning("MT5 not connected - cannot get tradeable symbol")
             return None
             
-        # First, check if exact symbol exists and is tradeable
-        info = mt5.symbol_info(requested_symbol)
-        if info and info.visible and info.trade_mode == mt5.SYMBOL_TRADE_MODE_FULL:
-            mt5.symbol_select(requested_symbol, True)
-            return requested_symbol
-        
-        # Check symbol map
-        if requested_symbol in self.symbol_map:
-            mapped = self.symbol_map[requested_symbol]
-            mt5.symbol_select(mapped, True)
+        # Every alias of a tradeable symbol is precomputed in the symbol map
+        mapped = self.symbol_map.get(requested_symbol)
+        if mapped is None:
+            # Try removing a broker suffix and check map
+            base_symbol = SYMBOL_SUFFIX_RE.sub('', requested_symbol)
+            mapped = self.symbol_map.get(base_symbol)
+        if mapped is not None:
+            self.select_symbol(mapped)
             return mapped
         
-        # Try removing .p, .s, .a suffixes and check map
-        base_symbol = requested_symbol.replace('.p', '').replace('.s', '').replace('.a', '')
-        if base_symbol in self.symbol_map:
-            mapped = self.symbol_map[base_symbol]
-            mt5.symbol_select(mapped, True)
-            return mapped
-        
-        # If still not found, try common suffixes
-        for suffix in ['.p', '.s', '.a', 'm', '']:
-            test_symbol = base_symbol + suffix
-            info = mt5.symbol_info(test_symbol)
-            if info and info.visible and info.trade_mode == mt5.SYMBOL_TRADE_MODE_FULL:
-                logger.info(f"Found tradeable variant: {test_symbol}")
-                mt5.symbol_select(test_symbol, True)
-                self.symbol_map[requested_symbol] = test_symbol
-                return test_symbol
+        # Not in the map (e.g. enabled after startup) - ask the terminal once
+        info = mt5.symbol_info(requested_symbol)
+        if (info and info.visible and info.trade_mode == mt5.SYMBOL_TRADE_MODE_FULL
+                and self.cache_volume_limits(info) is not None):
+            logger.info(f"Found tradeable symbol outside the symbol map: {requested_symbol}")
+            self.select_symbol(requested_symbol)
+            self.symbol_map[requested_symbol] = requested_symbol
+            return requested_symbol
         
         logger.warning(f"No tradeable version found for {requested_symbol}")
         return None
     
-    def has_open_position(self):
-        """Check if there are any open positions with our magic number"""
+    def cache_volume_limits(self, info):
+        """Remember a symbol's volume limits - they are fixed, so trades never re-query them
+        
+        Limits are kept as whole numbers of volume steps, plus the step and its decimal
+        places, so order volumes are computed in integers and rounded exactly once.
+        Returns None (nothing cached) if the terminal reports unusable limits.
+        """
+        step = info.volume_step
+        try:
+            if not step > 0:
+                raise ValueError(f"volume_step is {step}")
+            digits = max(0, -decimal.Decimal(str(step)).normalize().as_tuple().exponent)
+            limits = (round(info.volume_min / step), round(info.volume_max / step), step, digits)
+        except (ValueError, ArithmeticError) as e:
+            logger.warning(f"Skipping {info.name}: invalid volume limits ({e})")
+            return None
+        self.symbol_static[info.name] = limits
+        return limits
+    
+    def select_symbol(self, symbol):
+        """Add a symbol to Market Watch, skipping the call if it is already selected"""
+        if symbol not in self.selected_symbols and mt5.symbol_select(symbol, True):
+            self.selected_symbols.add(symbol)
+    
+    def get_positions(self):
+        """All open positions, reused for POSITIONS_CACHE_TTL so a signal costs one positions_get call"""
+        now = time.monotonic()
+        if self.positions_cache is None or now - self.positions_cache[0] > POSITIONS_CACHE_TTL:
+            self.positions_cache = (now, mt5.positions_get() or ())
+        return self.positions_cache[1]
+    
+    def invalidate_positions(self):
+        """Drop the cached positions after anything that may have opened or closed one"""
+        self.positions_cache = None
+    
+    def has_open_position(self, positions=None):
+        """Check if there are any open positions with our magic number
+        
+        positions is a positions snapshot the caller already holds; fetched if omitted.
+        """
         try:
             # Return False if MT5 is not connected
             if not self.mt5_connected:
                 return False
                 
-            # Get all open positions
-            positions = mt5.positions_get()
+            # Positions with our magic number, in a single pass over all open positions
+            if positions is None:
+                positions = self.get_positions()
+            our_positions = [pos for pos in positions if pos.magic == MAGIC_NUMBER]
             
-            if not positions:
+            if not our_positions:
                 return False
             
-            # Check for positions with our magic number (234000)
-            our_positions = [pos for pos in positions if pos.magic == 234000]
-            
-            if our_positions:
+            if logger.isEnabledFor(logging.INFO):
                 logger.info(f"Found {len(our_positions)} open NightTrader position(s)")
                 for pos in our_positions:
                     logger.info(f"  - {pos.symbol}: {'BUY' if pos.type == 0 else 'SELL'} {pos.volume} lots")
-                return True
-            
-            return False
+            return True
             
         except Exception as e:
             logger.error(f"Error checking open positions: {e}")
             return False
     
-    def close_opposite_positions(self, symbol, action):
-        """Close any open positions that are opposite to the incoming signal"""
+    def close_opposite_positions(self, symbol, action, tick=None, positions=None):
+        """Close any open positions that are opposite to the incoming signal
+        
+        tick and positions are the caller's current quote for symbol and positions
+        snapshot, if it already has them.
+        """
         try:
             # Return True if MT5 is not connected (nothing to close)
             if not self.mt5_connected:
                 return True
                 
-            # Get all open positions for this symbol
-            positions = mt5.positions_get(symbol=symbol)
-            
-            if not positions:
-                logger.info(f"No open positions for {symbol}")
-                return True
-            
-            # Filter positions by our magic number
-            our_positions = [pos for pos in positions if pos.magic == 234000]
-            
-            if not our_positions:
-                logger.info(f"No NightTrader positions for {symbol}")
-                return True
-            
             # Determine opposite position type
             # If incoming signal is BUY, close SELL positions (type=1)
             # If incoming signal is SELL, close BUY positions (type=0)
             opposite_type = 1 if action == 'BUY' else 0
             
-            positions_to_close = [pos for pos in our_positions if pos.type == opposite_type]
+            # Our positions (magic number) on this symbol of the opposite type, in a single pass
+            if positions is None:
+                positions = self.get_positions()
+            positions_to_close = [
+                pos for pos in positions
+                if pos.symbol == symbol and pos.magic == MAGIC_NUMBER and pos.type == opposite_type
+            ]
             
             if not positions_to_close:
-                logger.info(f"No opposite positions to close for {symbol}")
+                logger.info(f"No opposite NightTrader positions to close for {symbol}")
                 return True
             
             logger.info(f"Found {len(positions_to_close)} opposite positions to close")
             
+            # One quote for the whole batch instead of one per position
+            if tick is None:
+                tick = mt5.symbol_info_tick(symbol)
+            if not tick:
+                logger.error(f"Cannot get tick data for {symbol} - opposite positions not closed")
+                return False
+            
+            # Closure records go through the Redis write buffer like trade records
+            closed_at = datetime.now().isoformat()  # One timestamp for the whole batch
+            
             for position in positions_to_close:
                 # Prepare close request
                 close_type = mt5.ORDER_TYPE_BUY if position.type == 1 else mt5.ORDER_TYPE_SELL
                 
                 close_request = {
-                    "action": mt5.TRADE_ACTION_DEAL,
+                    **self.CLOSE_REQUEST_TEMPLATE,
                     "symbol": symbol,
                     "volume": position.volume,
                     "type": close_type,
                     "position": position.ticket,  # Important: specify the position to close
-                    "price": mt5.symbol_info_tick(symbol).ask if close_type == mt5.ORDER_TYPE_BUY else mt5.symbol_info_tick(symbol).bid,
-                    "deviation": 20,
-                    "magic": 234000,
-                    "comment": f"Close opposite position",
-                    "type_time": mt5.ORDER_TIME_GTC,
-                    "type_filling": mt5.ORDER_FILLING_IOC,
+                    "price": tick.ask if close_type == mt5.ORDER_TYPE_BUY else tick.bid,
+                    "comment": "Close opposite position",
                 }
                 
-                logger.info(f"Closing position {position.ticket} (type: {'SELL' if position.type == 1 else 'BUY'}, volume: {position.volume})")
+                logger.debug("Closing position %s (type: %s, volume: %s)",
+                             position.ticket, 'SELL' if position.type == 1 else 'BUY', position.volume)
                 
+                self.mark_order_sent()
                 result = mt5.order_send(close_request)
                 
                 if result is None:
@@ -248,26 +435,23 @@ class MT5Service:
                     logger.info(f"Successfully closed position {position.ticket} with order {result.order}")
                     
                     # Log the closure in Redis
-                    try:
+                    if self.redis_log is not None:
+                        # Values are stored as plain strings so redis-py skips its per-type encoding
                         closure_data = {
-                            "closed_position": position.ticket,
-                            "close_order": result.order,
+                            "closed_position": str(position.ticket),
+                            "close_order": str(result.order),
                             "symbol": symbol,
-                            "volume": position.volume,
-                            "timestamp": datetime.now().isoformat(),
+                            "volume": str(position.volume),
+                            "timestamp": closed_at,
                             "reason": "opposite_signal"
                         }
-                        self.redis_client.hset(
-                            f"position_closure:{result.order}",
-                            mapping=closure_data
-                        )
-                    except Exception as e:
-                        logger.warning(f"Failed to log position closure in Redis: {e}")
+                        self.buffer_redis_write(f"position_closure:{result.order}", closure_data)
             
+            self.invalidate_positions()
             return True
             
         except Exception as e:
-            logger.error(f"Error closing opposite positions: {e}", exc_info=True)
+            logger.error(f"Error closing opposite positions: {e}", exc_info=logger.isEnabledFor(logging.DEBUG))
             return False
     
     def close_positions_by_signal(self, signal):
@@ -291,60 +475,51 @@ class MT5Service:
             close_type = signal.get('type', 'all').lower()  # 'long', 'short', or 'all'
             close_reason = signal.get('reason', 'manual_close')
             
-            # Get all open positions for this symbol
-            positions = mt5.positions_get(symbol=symbol)
-            
-            if not positions:
-                logger.info(f"No open positions for {symbol}")
-                self.log_trade_attempt(signal, "SUCCESS", f"No positions to close for {symbol}")
-                return True
-            
-            # Filter positions by our magic number
-            our_positions = [pos for pos in positions if pos.magic == 234000]
-            
-            if not our_positions:
-                logger.info(f"No NightTrader positions for {symbol}")
-                self.log_trade_attempt(signal, "SUCCESS", f"No NightTrader positions to close for {symbol}")
-                return True
-            
-            # Filter by position type if specified
-            positions_to_close = our_positions
-            if close_type == 'long':
-                positions_to_close = [pos for pos in our_positions if pos.type == 0]  # BUY positions
-            elif close_type == 'short':
-                positions_to_close = [pos for pos in our_positions if pos.type == 1]  # SELL positions
+            # Filter by symbol, our magic number and, if specified, position type in a single pass
+            wanted_type = {'long': 0, 'short': 1}.get(close_type)  # BUY / SELL positions; None = all
+            positions_to_close = [
+                pos for pos in self.get_positions()
+                if pos.symbol == symbol and pos.magic == MAGIC_NUMBER and (wanted_type is None or pos.type == wanted_type)
+            ]
             
             if not positions_to_close:
-                logger.info(f"No {close_type} positions to close for {symbol}")
-                self.log_trade_attempt(signal, "SUCCESS", f"No {close_type} positions to close")
+                logger.info(f"No NightTrader {close_type} positions to close for {symbol}")
+                self.log_trade_attempt(signal, "SUCCESS", f"No NightTrader {close_type} positions to close for {symbol}")
                 return True
             
             logger.info(f"Found {len(positions_to_close)} position(s) to close for {symbol} (type: {close_type}, reason: {close_reason})")
             
+            # One quote for the whole batch instead of one per position
+            tick = mt5.symbol_info_tick(symbol)
+            if not tick:
+                logger.error(f"Cannot get tick data for {symbol}")
+                self.log_trade_attempt(signal, "FAILED", f"No tick data for {symbol}")
+                return True
+            
             closed_count = 0
             failed_count = 0
             
+            # Closure records go through the Redis write buffer like trade records
+            closed_at = datetime.now().isoformat()  # One timestamp for the whole batch
+            
             for position in positions_to_close:
                 # Prepare close request
                 close_order_type = mt5.ORDER_TYPE_BUY if position.type == 1 else mt5.ORDER_TYPE_SELL
                 
                 close_request = {
-                    "action": mt5.TRADE_ACTION_DEAL,
+                    **self.CLOSE_REQUEST_TEMPLATE,
                     "symbol": symbol,
                     "volume": position.volume,
                     "type": close_order_type,
                     "position": position.ticket,
-                    "price": mt5.symbol_info_tick(symbol).ask if close_order_type == mt5.ORDER_TYPE_BUY else mt5.symbol_info_tick(symbol).bid,
-                    "deviation": 20,
-                    "magic": 234000,
+                    "price": tick.ask if close_order_type == mt5.ORDER_TYPE_BUY else tick.bid,
                     "comment": f"Close: {close_reason}",
-                    "type_time": mt5.ORDER_TIME_GTC,
-                    "type_filling": mt5.ORDER_FILLING_IOC,
                 }
                 
                 position_type_str = 'LONG' if position.type == 0 else 'SHORT'
-                logger.info(f"Closing {position_type_str} position {position.ticket} (volume: {position.volume})")
+                logger.debug("Closing %s position %s (volume: %s)", position_type_str, position.ticket, position.volume)
                 
+                self.mark_order_sent()
                 result = mt5.order_send(close_request)
                 
                 if result is None:
@@ -359,23 +534,20 @@ class MT5Service:
                     closed_count += 1
                     
                     # Log the closure in Redis
-                    try:
+                    if self.redis_log is not None:
                         closure_data = {
-                            "signal_id": signal.get('id'),
-                            "closed_position": position.ticket,
-                            "close_order": result.order,
+                            "signal_id": str(signal.get('id')),
+                            "closed_position": str(position.ticket),
+                            "close_order": str(result.order),
                             "symbol": symbol,
-                            "volume": position.volume,
+                            "volume": str(position.volume),
                             "position_type": position_type_str,
-                            "timestamp": datetime.now().isoformat(),
+                            "timestamp": closed_at,
                             "reason": close_reason
                         }
-                        self.redis_client.hset(
-                            f"position_closure:{result.order}",
-                            mapping=closure_data
-                        )
-                    except Exception as e:
-                        logger.warning(f"Failed to log position closure in Redis: {e}")
+                        self.buffer_redis_write(f"position_closure:{result.order}", closure_data)
+            
+            self.invalidate_positions()
             
             # Log the overall result
             if failed_count == 0:
@@ -386,107 +558,252 @@ class MT5Service:
             return True
             
         except Exception as e:
-            logger.error(f"Error closing positions by signal: {e}", exc_info=True)
+            logger.error(f"Error closing positions by signal: {e}", exc_info=logger.isEnabledFor(logging.DEBUG))
             self.log_trade_attempt(signal, "ERROR", str(e))
             return False
     
+    def buffer_redis_write(self, key, mapping):
+        """Queue an HSET (a dict or TradeRecord) for the background flusher; never blocks the signal path on Redis"""
+        if self.redis_log is None:
+            return
+        with self.redis_buffer_lock:
+            if len(self.redis_buffer) == self.redis_buffer.maxlen:
+                logger.warning(f"Redis write buffer full - dropping oldest record to store {key}")
+            self.redis_buffer.append((key, mapping))
+        if len(self.redis_buffer) >= self.redis_pipeline_size:
+            self.flush_event.set()
+    
+    def flush_redis_buffer(self):
+        """Send buffered records to Redis, one pipeline round trip per batch
+        
+        Returns False if Redis could not be reached; the unsent batch is put back at
+        the front of the buffer so it is retried before newer records.
+        """
+        while self.redis_buffer:
+            batch = []
+            for _ in range(self.redis_pipeline_size):
+                try:
+                    batch.append(self.redis_buffer.popleft())
+                except IndexError:
+                    break
+            redis_pipe = self.redis_log.pipeline(transaction=False)
+            for key, mapping in batch:
+                if isinstance(mapping, TradeRecord):
+                    mapping = mapping.to_mapping()
+                redis_pipe.hset(key, mapping=mapping)
+            try:
+                redis_pipe.execute()
+            except (redis.ConnectionError, redis.TimeoutError) as e:
+                # Drop every pooled socket so the retry reconnects instead of reusing a dead one
+                logger.warning(f"Redis unreachable, keeping {len(batch)} record(s) for retry: {e}")
+                self.redis_log_pool.disconnect()
+                self.requeue_redis_batch(batch)
+                return False
+            except Exception as e:
+                # A rejected command would fail every retry, so this batch is not requeued
+                logger.warning(f"Failed to store {len(batch)} record(s) in Redis: {e}")
+        return True
+    
+    def requeue_redis_batch(self, batch):
+        """Put an unsent batch back at the front of the Redis buffer, oldest records first"""
+        with self.redis_buffer_lock:
+            # extendleft on a full deque would evict the newest records, so make room
+            # by dropping the oldest ones of the batch instead
+            room = self.redis_buffer.maxlen - len(self.redis_buffer)
+            if room < len(batch):
+                logger.warning(f"Redis write buffer full - dropping {len(batch) - room} oldest record(s)")
+                batch = batch[len(batch) - room:]
+            self.redis_buffer.extendleft(reversed(batch))
+    
+    def flush_trade_log(self):
+        """Append buffered trade log lines with a single os.write call"""
+        if not self.trade_log_buffer:
+            return
+        lines = []
+        while self.trade_log_buffer:
+            logged_at, status, signal, message, args = self.trade_log_buffer.popleft()
+            if args:
+                message = message % args
+            # os.linesep: the raw descriptor does no newline translation
+            lines.append(f"{datetime.fromtimestamp(logged_at).isoformat()} | {status} | {signal} | {message}{os.linesep}")
+        try:
+            os.write(self.trade_log_fd, "".join(lines).encode('utf-8'))
+        except Exception as e:
+            logger.warning(f"Failed to write {len(lines)} line(s) to trade log: {e}")
+    
+    def flusher_loop(self):
+        """Flush buffered writes every REDIS_FLUSH_MS, or sooner when a Redis batch fills up"""
+        redis_retry_delay = self.redis_flush_interval
+        redis_retry_at = 0.0
+        while not self.stop_event.is_set():
+            self.flush_event.wait(self.redis_flush_interval)
+            self.flush_event.clear()
+            # While Redis is down, back off exponentially; the trade log keeps flushing meanwhile
+            # Unexpected errors are logged rather than allowed to end the thread - nothing
+            # else writes the buffers until shutdown
+            try:
+                if self.redis_log is not None and time.monotonic() >= redis_retry_at:
+                    if self.flush_redis_buffer():
+                        redis_retry_delay = self.redis_flush_interval
+                    else:
+                        redis_retry_at = time.monotonic() + redis_retry_delay
+                        redis_retry_delay = min(redis_retry_delay * 2, REDIS_RETRY_MAX_DELAY)
+            except Exception:
+                logger.exception("Unexpected error flushing Redis records")
+            try:
+                self.flush_trade_log()
+            except Exception:
+                logger.exception("Unexpected error flushing the trade log")
+    
     def connect_rabbitmq(self):
         """Connect to RabbitMQ with enhanced parameters"""
         try:
-            # Get DigitalOcean IP
-            digitalocean_ip = os.getenv('DIGITALOCEAN_DROPLET_IP', os.getenv('DIGITALOCEAN_IP', '138.197.3.109'))
-            
-            # Get queue name from environment (VPS-specific or default)
-            self.queue_name = os.getenv('RABBITMQ_QUEUE_NAME', 'mt5_signals')
+            digitalocean_ip = self.digitalocean_ip
             logger.info(f"Using queue: {self.queue_name}")
             
-            # Get RabbitMQ credentials from environment (read-only consumer)
-            rabbitmq_user = os.getenv('RABBITMQ_USER', 'vps_consumer')
-            rabbitmq_password = os.getenv('RABBITMQ_PASSWORD')
+            # RabbitMQ credentials (read-only consumer)
+            rabbitmq_user = self.rabbitmq_user
+            rabbitmq_password = self.rabbitmq_password
             if not rabbitmq_password:
                 logger.error("RABBITMQ_PASSWORD not set in environment")
                 return False
             
             # Create connection parameters with heartbeat and timeout settings
-            logger.info(f"Connecting to RabbitMQ at {digitalocean_ip} with heartbeat={Config.RABBITMQ_HEARTBEAT}s...")
+            logger.info(f"Connecting to RabbitMQ at {digitalocean_ip} with heartbeat={CONFIG.RABBITMQ_HEARTBEAT}s...")
             
             # Build connection parameters with enhanced settings
             connection_params = pika.ConnectionParameters(
                 host=digitalocean_ip,
                 port=5672,
                 credentials=pika.PlainCredentials(rabbitmq_user, rabbitmq_password),
-                heartbeat=Config.RABBITMQ_HEARTBEAT,
-                blocked_connection_timeout=Config.RABBITMQ_BLOCKED_CONNECTION_TIMEOUT,
-                socket_timeout=Config.RABBITMQ_SOCKET_TIMEOUT,
-                connection_attempts=Config.RABBITMQ_CONNECTION_ATTEMPTS,
-                retry_delay=Config.RABBITMQ_RETRY_DELAY,
-                # TCP keepalive settings (helps detect broken connections)
+                heartbeat=CONFIG.RABBITMQ_HEARTBEAT,
+                blocked_connection_timeout=CONFIG.RABBITMQ_BLOCKED_CONNECTION_TIMEOUT,
+                socket_timeout=CONFIG.RABBITMQ_SOCKET_TIMEOUT,
+                connection_attempts=CONFIG.RABBITMQ_CONNECTION_ATTEMPTS,
+                retry_delay=CONFIG.RABBITMQ_RETRY_DELAY,
+                # TCP keepalive settings (helps detect broken connections). pika sets
+                # TCP_NODELAY on its own and only accepts TCP_* keepalive/timeout keys here
                 tcp_options={
-                    'TCP_KEEPIDLE': 120,  # Start keepalive after 2 minutes of idle
-                    'TCP_KEEPINTVL': 30,  # Interval between keepalive probes
-                    'TCP_KEEPCNT': 10,    # Number of keepalive probes
-                    'TCP_USER_TIMEOUT': 300000  # Total time for unacknowledged data (5 min)
+                    'TCP_KEEPIDLE': CONFIG.RABBITMQ_TCP_KEEPIDLE,  # Start keepalive after this many idle seconds
+                    'TCP_KEEPINTVL': CONFIG.RABBITMQ_TCP_KEEPINTVL,  # Interval between keepalive probes
+                    'TCP_KEEPCNT': CONFIG.RABBITMQ_TCP_KEEPCNT,  # Number of keepalive probes
+                    'TCP_USER_TIMEOUT': CONFIG.RABBITMQ_TCP_USER_TIMEOUT  # Total time for unacknowledged data (ms)
                 }
             )
             
-            # Create connection
-            self.rabbitmq_connection = pika.BlockingConnection(connection_params)
-            self.rabbitmq_channel = self.rabbitmq_connection.channel()
-            
-            # Set QoS
-            self.rabbitmq_channel.basic_qos(prefetch_count=1)
-            
-            # Try to check if queue exists (passive declare)
-            try:
-                self.rabbitmq_channel.queue_declare(queue=self.queue_name, durable=True, passive=True)
-                logger.info(f"Queue {self.queue_name} exists")
-            except pika.exceptions.ChannelClosedByBroker as e:
-                if "ACCESS_REFUSED" in str(e):
-                    logger.info(f"Read-only access confirmed - queue {self.queue_name} should exist")
-                    # Recreate channel after ACCESS_REFUSED error
-                    self.rabbitmq_channel = self.rabbitmq_connection.channel()
-                    self.rabbitmq_channel.basic_qos(prefetch_count=1)
-                elif "NOT_FOUND" in str(e):
-                    logger.error(f"Queue {self.queue_name} does not exist on server")
-                    return False
-                else:
-                    raise
-            
-            logger.info(f"RabbitMQ connected successfully to queue: {self.queue_name}")
+            # Create connection - the handshake completes on the IO loop,
+            # which drives the rest of the setup through the callbacks below
+            self.consuming = False
+            self.rabbitmq_connection = pika.SelectConnection(
+                parameters=connection_params,
+                on_open_callback=self.on_connection_open,
+                on_open_error_callback=self.on_connection_open_error,
+                on_close_callback=self.on_connection_closed
+            )
             return True
             
-        except pika.exceptions.AMQPConnectionError as e:
-            logger.error(f"RabbitMQ connection failed: {e}")
-            return False
         except Exception as e:
             logger.error(f"Unexpected error connecting to RabbitMQ: {e}")
             return False
     
+    def on_connection_open(self, connection):
+        """RabbitMQ connection established - open a channel"""
+        logger.info("RabbitMQ connection opened")
+        connection.channel(on_open_callback=self.on_channel_open)
+    
+    def on_connection_open_error(self, connection, error):
+        """RabbitMQ connection could not be established"""
+        logger.error(f"RabbitMQ connection failed: {error!r}")
+        connection.ioloop.stop()
+    
+    def on_connection_closed(self, connection, reason):
+        """RabbitMQ connection closed - stop the IO loop so the consume loop can reconnect"""
+        self.rabbitmq_channel = None
+        if self.stop_event.is_set():
+            logger.info("RabbitMQ connection closed")
+        else:
+            logger.error(f"RabbitMQ connection closed unexpectedly: {reason}")
+        connection.ioloop.stop()
+    
+    def on_channel_open(self, channel, check_queue=True):
+        """Channel opened - set QoS and verify the queue"""
+        self.rabbitmq_channel = channel
+        channel.add_on_close_callback(functools.partial(self.on_channel_closed, check_queue=check_queue))
+        
+        # Set QoS - a per-consumer limit (global_qos=False), so the broker never pushes more
+        # than RABBITMQ_PREFETCH unacked signals to this VPS
+        channel.basic_qos(
+            prefetch_count=CONFIG.RABBITMQ_PREFETCH,
+            global_qos=False,
+            callback=functools.partial(self.on_qos_ok, check_queue=check_queue)
+        )
+    
+    def on_qos_ok(self, _frame, check_queue=True):
+        """QoS set - check if queue exists (passive declare), then consume"""
+        if not check_queue:
+            self.start_consuming()
+            return
+        
+        self.rabbitmq_channel.queue_declare(
+            queue=self.queue_name,
+            durable=True,
+            passive=True,
+            callback=self.on_queue_declare_ok
+        )
+    
+    def on_queue_declare_ok(self, _frame):
+        logger.info(f"Queue {self.queue_name} exists")
+        self.start_consuming()
+    
+    def on_channel_closed(self, channel, reason, check_queue=False):
+        """Channel closed by the broker"""
+        if self.stop_event.is_set() or not self.rabbitmq_connection or not self.rabbitmq_connection.is_open:
+            return
+        
+        reply_code = getattr(reason, 'reply_code', None)
+        if check_queue and not self.consuming and reply_code == 403:  # ACCESS_REFUSED
+            logger.info(f"Read-only access confirmed - queue {self.queue_name} should exist")
+            # Recreate channel after ACCESS_REFUSED error
+            self.rabbitmq_connection.channel(
+                on_open_callback=functools.partial(self.on_channel_open, check_queue=False)
+            )
+            return
+        
+        if check_queue and not self.consuming and reply_code == 404:  # NOT_FOUND
+            logger.error(f"Queue {self.queue_name} does not exist on server")
+        else:
+            logger.error(f"RabbitMQ channel closed unexpectedly: {reason}")
+        self.rabbitmq_connection.close()
+    
+    def start_consuming(self):
+        """Register the consumer on the open channel"""
+        logger.info(f"Setting up consumer for queue: {self.queue_name}")
+        self.rabbitmq_channel.basic_consume(
+            queue=self.queue_name,
+            on_message_callback=self.on_message,
+            auto_ack=False
+        )
+        self.consuming = True
+        self.reconnect_delay = CONFIG.RABBITMQ_RETRY_DELAY  # Reset delay
+        logger.info(f"RabbitMQ connected successfully to queue: {self.queue_name}")
+        logger.info(f"Starting to consume messages from queue: {self.queue_name}")
+    
     def connect_redis(self):
         """Connect to Redis with retry logic"""
         try:
-            # Get DigitalOcean IP
-            digitalocean_ip = os.getenv('DIGITALOCEAN_DROPLET_IP', os.getenv('DIGITALOCEAN_IP', '138.197.3.109'))
-            
-            # Get Redis password from environment
-            redis_password = os.getenv('REDIS_PASSWORD')
+            digitalocean_ip = self.digitalocean_ip
+            redis_password = self.redis_password
             if not redis_password:
                 logger.error("REDIS_PASSWORD not set in environment")
                 return False
             
             # Connect to Redis
             logger.info(f"Connecting to Redis at {digitalocean_ip}...")
-            self.redis_client = redis.Redis(
-                host=digitalocean_ip,
-                port=6379,
-                password=redis_password,
-                decode_responses=True,
-                socket_connect_timeout=10,
-                socket_timeout=5,
-                retry_on_timeout=True,
-                retry_on_error=[ConnectionError, TimeoutError],
-                health_check_interval=30
-            )
+            if self.redis_pool is None:
+                self.create_redis_pools(digitalocean_ip, redis_password)
+            self.redis_client = redis.Redis(connection_pool=self.redis_pool)
+            # HSET replies are never read, so the logging client skips decoding them
+            self.redis_log = redis.Redis(connection_pool=self.redis_log_pool)
             self.redis_client.ping()
             logger.info("Redis connected")
             return True
@@ -495,12 +812,41 @@ class MT5Service:
             logger.error(f"Redis connection error: {e}")
             return False
     
+    def create_redis_pools(self, host, password):
+        """Create the Redis connection pools once; reconnects reuse their sockets"""
+        # decode_responses is a connection setting, so decoded and raw clients need separate pools
+        # Keepalive probe timing; constants missing on older Windows builds are skipped
+        keepalive_options = {
+            option: value for option, value in (
+                (getattr(socket, 'TCP_KEEPIDLE', None), CONFIG.REDIS_TCP_KEEPIDLE),
+                (getattr(socket, 'TCP_KEEPINTVL', None), CONFIG.REDIS_TCP_KEEPINTVL),
+                (getattr(socket, 'TCP_KEEPCNT', None), CONFIG.REDIS_TCP_KEEPCNT),
+            ) if option is not None
+        }
+        pool_kwargs = dict(
+            host=host,
+            port=6379,
+            password=password,
+            socket_connect_timeout=10,
+            socket_timeout=5,
+            retry_on_timeout=True,
+            retry_on_error=[redis.ConnectionError, redis.TimeoutError],  # redis-py exceptions, not the builtins
+            health_check_interval=30,
+            # redis-py already sets TCP_NODELAY; keepalive lets idle pooled sockets detect a dead peer
+            socket_keepalive=True,
+            socket_keepalive_options=keepalive_options,
+            max_connections=CONFIG.REDIS_POOL_SIZE
+        )
+        self.redis_pool = redis.ConnectionPool(decode_responses=True, **pool_kwargs)
+        self.redis_log_pool = redis.ConnectionPool(decode_responses=False, **pool_kwargs)
+    
     def connect_services(self):
         """Connect to RabbitMQ and Redis on DigitalOcean"""
         # Connect to Redis first (less critical)
         if not self.connect_redis():
             logger.warning("Failed to connect to Redis - continuing without Redis logging")
             self.redis_client = None
+            self.redis_log = None
         
         # Connect to RabbitMQ (critical)
         if not self.connect_rabbitmq():
@@ -508,16 +854,21 @@ class MT5Service:
         
         return True
     
-    def process_signal(self, signal):
-        """Process trading signal with improved error handling"""
-        webhook_time = None  # Define at function scope
+    def process_signal(self, signal, received_ns=None):
+        """Process trading signal with improved error handling
+        
+        received_ns is the time.monotonic_ns() reading taken when the message was delivered.
+        """
+        webhook_ns = None  # Define at function scope
         
         try:
             # Add 'id' if missing
             if 'id' not in signal:
-                signal['id'] = str(uuid.uuid4())
+                signal['id'] = uuid.uuid4().hex  # Skips the dashed str() formatting
             
-            logger.info(f"Processing signal: {signal}")
+            # The signal dict is only turned into a string when INFO is actually logged
+            if logger.isEnabledFor(logging.INFO):
+                logger.info("Processing signal: %s", signal)
             
             # CRITICAL: Check if MT5 is connected before processing
             if not self.mt5_connected:
@@ -534,22 +885,45 @@ class MT5Service:
                 self.log_trade_attempt(signal, "REJECTED", f"Wrong VPS: {signal_vps_id}")
                 return True  # ACK to prevent redelivery
             
-            # Calculate time since webhook received signal
-            if 'timestamp' in signal:
-                try:
-                    webhook_time = datetime.fromisoformat(signal['timestamp'].replace('Z', '+00:00'))
-                    current_time = datetime.now(timezone.utc)
-                    time_diff = (current_time - webhook_time).total_seconds()
-                    logger.info(f"Signal age: {time_diff:.2f} seconds since webhook received it")
-                    
-                    # Warn if signal is older than 5 seconds (should have expired in queue)
-                    if time_diff > 5:
-                        logger.warning(f"⚠️ Processing old signal: {time_diff:.2f}s old (>5s TTL)")
-                        logger.warning("This signal should have expired - check RabbitMQ TTL settings")
-                        # Still process it since it made it through the queue
-                        # but this indicates a configuration issue
-                except Exception as e:
-                    logger.warning(f"Could not parse webhook timestamp: {e}")
+            # Calculate time since webhook received signal - ts_ns (epoch nanoseconds)
+            # avoids parsing the ISO timestamp, which is kept for older producers
+            try:
+                if 'ts_ns' in signal:
+                    webhook_ns = int(signal['ts_ns'])
+                elif 'timestamp' in signal:
+                    # fromisoformat accepts a trailing 'Z' natively since Python 3.11
+                    webhook_time = datetime.fromisoformat(signal['timestamp'])
+                    if webhook_time.tzinfo is None:
+                        # Naive timestamps are taken as UTC, never as this VPS's local time
+                        webhook_time = webhook_time.replace(tzinfo=timezone.utc)
+                    webhook_ns = int(webhook_time.timestamp() * 1_000_000_000)
+            except Exception as e:
+                logger.warning(f"Could not parse webhook timestamp: {e}")
+            
+            if webhook_ns is not None:
+                time_diff = (time.time_ns() - webhook_ns) / 1_000_000_000
+                logger.info(f"Signal age: {time_diff:.2f} seconds since webhook received it")
+                
+                # Drop signals older than the TTL before any MT5 calls - the price
+                # they were sent for is gone (they should have expired in the queue)
+                if time_diff > self.signal_max_age:
+                    logger.warning(f"⚠️ Dropping old signal: {time_diff:.2f}s old (>{self.signal_max_age}s TTL)")
+                    logger.warning("This signal should have expired - check RabbitMQ TTL settings")
+                    self.log_trade_attempt(signal, "EXPIRED", f"Signal {time_diff:.2f}s old")
+                    return True  # ACK so it is not redelivered
+            
+            action = signal.get('action', 'BUY').upper()
+            
+            # Single trade mode skips most signals once a position is open, so decide that
+            # before any symbol/tick/account IPC. One positions snapshot (cached for
+            # POSITIONS_CACHE_TTL) answers both this and the opposite-position check.
+            positions = None
+            if action != 'CLOSE':
+                positions = self.get_positions() if self.serialize_signals else None
+                if self.single_trade_mode and self.has_open_position(positions):
+                    logger.info(f"[SINGLE TRADE MODE] Skipping signal - already have open position(s)")
+                    self.log_trade_attempt(signal, "SKIPPED", "Single trade mode - position already open")
+                    return True  # Acknowledge message to prevent queue buildup
             
             # Get tradeable symbol
             requested_symbol = signal.get('symbol', 'EURUSD')
@@ -560,8 +934,6 @@ class MT5Service:
                 self.log_trade_attempt(signal, "FAILED", f"No tradeable symbol for {requested_symbol}")
                 return True
             
-            action = signal.get('action', 'BUY').upper()
-            
             # Handle CLOSE action
             if action == 'CLOSE':
                 logger.info(f"Processing CLOSE signal for {requested_symbol}")
@@ -571,19 +943,25 @@ class MT5Service:
             
             logger.info(f"Using tradeable symbol: {symbol} (requested: {requested_symbol})")
             
-            # Check if MT5 is still connected (only if we had a connection)
-            if self.mt5_connected and not mt5.terminal_info():
-                logger.error("MT5 connection lost, reconnecting...")
-                if not self.connect_mt5():
-                    logger.error("Failed to reconnect to MT5")
-                    self.log_trade_attempt(signal, "FAILED", "MT5 connection lost")
+            # Volume limits come from the cache; only the quote is fetched per signal
+            volume_limits = self.symbol_static.get(symbol)
+            if volume_limits is None:
+                symbol_info = mt5.symbol_info(symbol)
+                if not symbol_info:
+                    logger.error(f"Symbol {symbol} not found")
+                    self.log_trade_attempt(signal, "FAILED", f"Symbol {symbol} not found")
+                    return True
+                volume_limits = self.cache_volume_limits(symbol_info)
+                if volume_limits is None:
+                    self.log_trade_attempt(signal, "FAILED", f"Invalid volume limits for {symbol}")
                     return True
             
-            # Get symbol info
-            symbol_info = mt5.symbol_info(symbol)
-            if not symbol_info:
-                logger.error(f"Symbol {symbol} not found")
-                self.log_trade_attempt(signal, "FAILED", f"Symbol {symbol} not found")
+            tick = mt5.symbol_info_tick(symbol)
+            if not tick and self.recover_mt5():
+                tick = mt5.symbol_info_tick(symbol)
+            if not tick:
+                logger.error(f"Cannot get tick data for {symbol}")
+                self.log_trade_attempt(signal, "FAILED", f"No tick data for {symbol}")
                 return True
             
             # Check account
@@ -593,59 +971,37 @@ class MT5Service:
                 self.log_trade_attempt(signal, "FAILED", "Cannot get account info")
                 return True
             
-            # Check if in single trade mode
-            if Config.SINGLE_TRADE_MODE:
-                if self.has_open_position():
-                    logger.info(f"[SINGLE TRADE MODE] Skipping signal - already have open position(s)")
-                    self.log_trade_attempt(signal, "SKIPPED", "Single trade mode - position already open")
-                    return True  # Acknowledge message to prevent queue buildup
-            
             # Close opposite positions if enabled
-            if Config.CLOSE_OPPOSITE_POSITIONS:
+            if self.close_opposite_enabled:
                 logger.info(f"Checking for opposite positions to close...")
-                if not self.close_opposite_positions(symbol, action):
+                if not self.close_opposite_positions(symbol, action, tick, positions):
                     logger.warning("Failed to close some opposite positions, but continuing with new order")
             
-            # Prepare order
-            order_type = mt5.ORDER_TYPE_BUY if action == 'BUY' else mt5.ORDER_TYPE_SELL
-            price = symbol_info.ask if action == 'BUY' else symbol_info.bid
-            
-            # Adjust volume to symbol requirements
-            volume = max(symbol_info.volume_min, min(quantity, symbol_info.volume_max))
-            volume = round(volume / symbol_info.volume_step) * symbol_info.volume_step
-            
-            request = {
-                "action": mt5.TRADE_ACTION_DEAL,
-                "symbol": symbol,
-                "volume": volume,
-                "type": order_type,
-                "price": price,
-                "deviation": 20,
-                "magic": 234000,
-                "comment": f"NightTrader {action}",
-                "type_time": mt5.ORDER_TIME_GTC,
-                "type_filling": mt5.ORDER_FILLING_IOC,
-            }
+            # Prepare order - direction is +1 for BUY and -1 for SELL, so SL/TP
+            # distances land on the correct side of the entry price
+            if action == 'BUY':
+                template, direction, price = self.BUY_REQUEST_TEMPLATE, 1, tick.ask
+            else:
+                template, direction, price = self.SELL_REQUEST_TEMPLATE, -1, tick.bid
+            
+            # Adjust volume to symbol requirements - clamp a whole number of steps, then
+            # round away float drift (0.1 * 3 = 0.30000000000000004) that MT5 would reject
+            min_steps, max_steps, volume_step, volume_digits = volume_limits
+            steps = max(min_steps, min(round(quantity / volume_step), max_steps))
+            volume = round(steps * volume_step, volume_digits)
+            
+            request = {**template, "symbol": symbol, "volume": volume, "price": price}
             
             # Add SL/TP if provided (as distances from entry)
-            if 'sl' in signal:
-                sl_distance = float(signal['sl'])
-                if action == 'BUY':
-                    request['sl'] = price - sl_distance  # For BUY: SL below entry
-                else:
-                    request['sl'] = price + sl_distance  # For SELL: SL above entry
-                    
-            if 'tp' in signal:
-                tp_distance = float(signal['tp'])
-                if action == 'BUY':
-                    request['tp'] = price + tp_distance  # For BUY: TP above entry
-                else:
-                    request['tp'] = price - tp_distance  # For SELL: TP below entry
+            sl_distance = float(signal['sl']) if 'sl' in signal else None
+            tp_distance = float(signal['tp']) if 'tp' in signal else None
+            self.set_entry_price(request, price, direction, sl_distance, tp_distance)
             
-            logger.info(f"Sending order: {request}")
+            logger.info("Sending order: %s", request)
             
             # Send order with error handling
-            result = mt5.order_send(request)
+            result = self.send_order(request, direction, sl_distance, tp_distance)
+            self.invalidate_positions()
             
             if result is None:
                 error = mt5.last_error()
@@ -664,166 +1020,264 @@ class MT5Service:
                 
                 # Calculate total execution time
                 execution_time = None
-                if webhook_time:
-                    execution_time = (datetime.now(timezone.utc) - webhook_time).total_seconds()
+                if webhook_ns is not None:
+                    execution_time = (time.time_ns() - webhook_ns) / 1_000_000_000
                     logger.info(f"[TIMING] Total execution time: {execution_time:.3f} seconds")
+                # Local part of the latency - monotonic, so unaffected by clock adjustments
+                if received_ns is not None:
+                    logger.info(f"[TIMING] Time since delivery: {(time.monotonic_ns() - received_ns) / 1_000_000:.1f} ms")
                 
-                self.log_trade_attempt(signal, "SUCCESS", f"Order #{result.order} - Execution time: {execution_time:.3f}s" if execution_time else f"Order #{result.order}")
+                if execution_time:
+                    self.log_trade_attempt(signal, "SUCCESS", "Order #%s - Execution time: %.3fs", result.order, execution_time)
+                else:
+                    self.log_trade_attempt(signal, "SUCCESS", "Order #%s", result.order)
                 
-                # Store in Redis with execution time
+                # Store in Redis with execution time (written by the flusher thread)
                 try:
-                    trade_data = {
-                        "signal_id": signal.get('id'),
-                        "symbol": symbol,
-                        "requested_symbol": requested_symbol,
-                        "action": action,
-                        "volume": volume,
-                        "price": result.price,
-                        "timestamp": datetime.now().isoformat(),
-                        "webhook_timestamp": signal.get('timestamp'),
-                        "execution_time_seconds": execution_time
-                    }
-                    self.redis_client.hset(
-                        f"trade:{result.order}",
-                        mapping=trade_data
+                    trade_data = TradeRecord(
+                        signal_id=signal['id'],
+                        symbol=symbol,
+                        requested_symbol=requested_symbol,
+                        action=action,
+                        volume=volume,
+                        price=result.price,
+                        timestamp=datetime.now().isoformat(),
+                        webhook_timestamp=signal.get('timestamp'),
+                        execution_time_seconds=execution_time
                     )
+                    self.buffer_redis_write(f"trade:{result.order}", trade_data)
                 except Exception as e:
                     logger.warning(f"Failed to store trade in Redis: {e}")
                 
                 return True
                 
         except Exception as e:
-            logger.error(f"Error processing signal: {e}", exc_info=True)
+            # Tracebacks only at DEBUG - the message is enough to diagnose the usual MT5/data errors
+            logger.error(f"Error processing signal: {e}", exc_info=logger.isEnabledFor(logging.DEBUG))
             self.log_trade_attempt(signal, "ERROR", str(e))
             return True
     
-    def log_trade_attempt(self, signal, status, message):
-        """Log trade attempts to file"""
-        try:
-            log_file = os.path.join(log_dir, "trade_attempts.log")
-            with open(log_file, 'a') as f:
-                f.write(f"{datetime.now().isoformat()} | {status} | {signal} | {message}\n")
-        except:
-            pass
+    def recover_mt5(self):
+        """Reconnect to MT5 if the terminal or its trade server connection is gone
+        
+        Called only after an MT5 call failed, so healthy signals never pay for a
+        liveness check. Returns True when a reconnect happened and succeeded.
+        """
+        terminal = mt5.terminal_info()
+        if terminal and terminal.connected:
+            return False  # Connection is fine - the failure was something else
+        
+        logger.error("MT5 connection lost, reconnecting...")
+        if not self.connect_mt5():
+            logger.error("Failed to reconnect to MT5")
+            return False
+        return True
+    
+    def mark_order_sent(self):
+        """Note that the current signal reached order_send, so its ack must not wait for a batch"""
+        self.worker_state.order_sent = True
+    
+    @staticmethod
+    def set_entry_price(request, price, direction, sl_distance=None, tp_distance=None):
+        """Set the order price and place SL/TP at their distances from it
+        
+        direction is +1 for BUY and -1 for SELL, so the stops land on the correct side.
+        """
+        request['price'] = price
+        if sl_distance is not None:
+            request['sl'] = price - direction * sl_distance  # BUY: below entry, SELL: above
+        if tp_distance is not None:
+            request['tp'] = price + direction * tp_distance  # BUY: above entry, SELL: below
+    
+    def send_order(self, request, direction, sl_distance=None, tp_distance=None):
+        """Send an order, retrying once if it failed because the MT5 connection was lost"""
+        self.mark_order_sent()
+        result = mt5.order_send(request)
+        if (result is None or result.retcode == mt5.TRADE_RETCODE_CONNECTION) and self.recover_mt5():
+            # The quote may have moved while reconnecting - reprice, and move SL/TP with it
+            tick = mt5.symbol_info_tick(request['symbol'])
+            if tick:
+                price = tick.ask if direction > 0 else tick.bid
+                self.set_entry_price(request, price, direction, sl_distance, tp_distance)
+            result = mt5.order_send(request)
+        return result
+    
+    def log_trade_attempt(self, signal, status, message, *args):
+        """Log trade attempts to file
+        
+        Like logging, message is %-formatted with args - but only later, on the
+        flusher thread, which also builds the rest of the line.
+        """
+        if self.trade_log_fd is not None:
+            self.trade_log_buffer.append((time.time(), status, signal, message, args))
     
     def on_message(self, channel, method, properties, body):
-        """Handle incoming message from RabbitMQ"""
+        """Handle incoming message from RabbitMQ
+        
+        Runs on the IO loop, so it only hands the message to the signal worker;
+        the IO loop keeps reading deliveries and heartbeats while MT5 executes.
+        """
         try:
-            signal = json.loads(body)
-            logger.info(f"Received signal: {signal}")
-            
-            success = self.process_signal(signal)
-            channel.basic_ack(delivery_tag=method.delivery_tag)
-            
-            if success:
-                logger.info("Signal processed and acknowledged")
-            else:
-                logger.warning("Signal processing had issues but acknowledged")
+            self.signal_queue.put_nowait((channel, method.delivery_tag, body, time.monotonic_ns()))
+        except queue.Full:
+            # Never block the IO loop - hand the message back for redelivery
+            logger.warning(f"Signal queue full - requeueing message {method.delivery_tag}")
+            channel.basic_reject(delivery_tag=method.delivery_tag, requeue=True)
+            self.ack_message(channel, method.delivery_tag, needs_ack=False)
+    
+    def signal_worker_loop(self):
+        """Process queued signals and acknowledge them on the IO loop (one loop per worker thread)"""
+        while True:
+            item = self.signal_queue.get()
+            if item is None:
+                break
+            channel, delivery_tag, body, received_ns = item
+            
+            if self.stop_event.is_set():
+                # Shutting down - leave it unacked so the broker requeues it when the channel closes
+                logger.info(f"Shutdown in progress - not executing message {delivery_tag}, it will be redelivered")
+                continue
+            
+            if not channel.is_open:
+                # The broker requeues unacked messages when a channel dies, so this
+                # delivery will arrive again on the new channel - don't execute it twice
+                logger.warning(f"Skipping message {delivery_tag} from a closed channel - it will be redelivered")
+                continue
+            
+            self.worker_state.order_sent = False
+            try:
+                signal = json_loads(body)
+                logger.info("Received signal: %s", signal)
                 
-        except Exception as e:
-            logger.error(f"Message handling error: {e}")
-            channel.basic_ack(delivery_tag=method.delivery_tag)
+                with self.order_lock if self.serialize_signals else contextlib.nullcontext():
+                    success = self.process_signal(signal, received_ns)
+                
+                if success:
+                    logger.info("Signal processed and acknowledged")
+                else:
+                    logger.warning("Signal processing had issues but acknowledged")
+                    
+            except ValueError as e:
+                # Malformed JSON (orjson and json decode errors are both ValueErrors) - acked, never retried
+                logger.error(f"Invalid signal payload for message {delivery_tag}: {e}")
+            except Exception as e:
+                logger.error(f"Message handling error: {e}", exc_info=logger.isEnabledFor(logging.DEBUG))
+            
+            # pika is not thread safe - the ack must be sent from the IO loop
+            try:
+                channel.connection.ioloop.add_callback_threadsafe(
+                    functools.partial(self.ack_message, channel, delivery_tag,
+                                      urgent=self.worker_state.order_sent)
+                )
+            except Exception as e:
+                logger.warning(f"Could not schedule ack for message {delivery_tag}: {e}")
     
-    def ensure_rabbitmq_connected(self):
-        """Ensure RabbitMQ is connected, reconnect if necessary"""
-        try:
-            if self.rabbitmq_connection and not self.rabbitmq_connection.is_closed:
-                # Try to check connection health
-                self.rabbitmq_connection.process_data_events(time_limit=0)
-                return True
-        except Exception as e:
-            logger.warning(f"RabbitMQ connection check failed: {e}")
+    def ack_message(self, channel, delivery_tag, needs_ack=True, urgent=False):
+        """Record a finished message; acks are sent in batches (IO loop thread only)
         
-        # Connection is closed or unhealthy, attempt reconnection
-        logger.info("RabbitMQ connection lost, attempting to reconnect...")
+        needs_ack is False for deliveries that were already settled some other way
+        (rejected back to the queue) but still count towards the contiguous range.
+        urgent marks a message that sent an order: it is acked as soon as the contiguous
+        range reaches it, since a redelivery after a reconnect would trade it again.
+        Only no-trade outcomes (skipped, expired, rejected, invalid) wait for a batch.
+        """
+        if not channel.is_open:
+            logger.warning(f"Channel closed before message {delivery_tag} could be acknowledged - it will be redelivered")
+            return
         
-        # Close existing connection cleanly if possible
-        try:
-            if self.rabbitmq_connection:
-                self.rabbitmq_connection.close()
-        except:
-            pass
+        if channel is not self.ack_channel:
+            # New channel after a reconnect - tags from the old one are meaningless
+            self.ack_channel = channel
+            self.pending_ack_count = 0
+            self.ack_timer = None
+            self.ack_floor = 0
+            self.finished_tags.clear()
+            self.urgent_tags.clear()
         
-        self.rabbitmq_connection = None
-        self.rabbitmq_channel = None
+        # Workers can finish out of order, and a multi-ack covers every earlier tag,
+        # so only the contiguous run of finished tags may be acknowledged
+        self.finished_tags[delivery_tag] = needs_ack
+        if urgent:
+            self.urgent_tags.add(delivery_tag)
+        flush_now = False
+        while self.ack_floor + 1 in self.finished_tags:
+            self.ack_floor += 1
+            if self.finished_tags.pop(self.ack_floor):
+                self.pending_ack_tag = self.ack_floor
+                self.pending_ack_count += 1
+            if self.ack_floor in self.urgent_tags:
+                self.urgent_tags.discard(self.ack_floor)
+                flush_now = True
         
-        # Attempt reconnection with exponential backoff
-        retry_count = 0
-        while not self.should_stop:
-            retry_count += 1
-            
-            if self.connect_rabbitmq():
-                logger.info("Successfully reconnected to RabbitMQ")
-                self.reconnect_delay = Config.RABBITMQ_RETRY_DELAY  # Reset delay
-                return True
-            
-            # Calculate backoff delay
-            self.reconnect_delay = min(self.reconnect_delay * 2, Config.RABBITMQ_MAX_RETRY_DELAY)
-            
-            logger.warning(f"Reconnection attempt {retry_count} failed. Waiting {self.reconnect_delay} seconds before retry...")
-            
-            # Wait with ability to stop
-            for _ in range(self.reconnect_delay):
-                if self.should_stop:
-                    return False
-                time.sleep(1)
+        if not self.pending_ack_count:
+            return
+        if flush_now or self.pending_ack_count >= self.ack_batch_size:
+            self.flush_acks()
+        elif self.ack_timer is None:
+            self.ack_timer = channel.connection.ioloop.call_later(
+                self.ack_flush_delay, self.on_ack_timer
+            )
+    
+    def on_ack_timer(self):
+        self.ack_timer = None
+        self.flush_acks()
+    
+    def flush_acks(self):
+        """Acknowledge all processed messages with a single multi-ack (IO loop thread only)"""
+        if self.ack_timer is not None:
+            self.ack_channel.connection.ioloop.remove_timeout(self.ack_timer)
+            self.ack_timer = None
         
-        return False
+        if self.pending_ack_count and self.ack_channel and self.ack_channel.is_open:
+            try:
+                self.ack_channel.basic_ack(delivery_tag=self.pending_ack_tag, multiple=True)
+            except Exception as e:
+                # Unacked messages are requeued by the broker when the channel closes
+                logger.warning(f"Failed to acknowledge messages up to {self.pending_ack_tag}: {e}")
+        self.pending_ack_count = 0
+    
+    def wait_before_reconnect(self, retry_count):
+        """Wait with exponential backoff before the next connection attempt"""
+        # Jitter the second half of the delay so VPS instances that lost the broker
+        # together don't all reconnect on the same schedule
+        delay = self.reconnect_delay / 2 + random.uniform(0, self.reconnect_delay / 2)
+        logger.warning(f"Reconnection attempt {retry_count} failed. Waiting {delay:.1f} seconds before retry...")
+        
+        # Wait with ability to stop - returns as soon as shutdown begins
+        if self.stop_event.wait(delay):
+            return
+        
+        # Calculate backoff delay
+        self.reconnect_delay = min(self.reconnect_delay * 2, CONFIG.RABBITMQ_MAX_RETRY_DELAY)
     
     def consume_with_reconnect(self):
         """Consume messages with automatic reconnection on failure"""
-        while not self.should_stop:
+        retry_count = 0
+        while not self.stop_event.is_set():
             try:
-                # Ensure we're connected
-                if not self.ensure_rabbitmq_connected():
-                    if self.should_stop:
-                        break
-                    continue
+                if self.connect_rabbitmq():
+                    # Runs until the connection fails or closes
+                    self.rabbitmq_connection.ioloop.start()
                 
-                # Setup consumer
-                logger.info(f"Setting up consumer for queue: {self.queue_name}")
-                self.rabbitmq_channel.basic_consume(
-                    queue=self.queue_name,
-                    on_message_callback=self.on_message,
-                    auto_ack=False
-                )
-                
-                logger.info(f"Starting to consume messages from queue: {self.queue_name}")
-                
-                # Start consuming with connection monitoring
-                try:
-                    # Process messages until connection fails or stop is requested
-                    while not self.should_stop:
-                        try:
-                            # Process with timeout to allow periodic checks
-                            self.rabbitmq_connection.process_data_events(time_limit=1)
-                        except pika.exceptions.ConnectionClosed:
-                            logger.error("RabbitMQ connection closed unexpectedly")
-                            break
-                        except pika.exceptions.ChannelClosed:
-                            logger.error("RabbitMQ channel closed unexpectedly")
-                            break
-                        except pika.exceptions.StreamLostError as e:
-                            logger.error(f"RabbitMQ stream lost: {e}")
-                            break
-                        except socket.timeout:
-                            # Normal timeout, continue
-                            continue
-                        except Exception as e:
-                            logger.error(f"Unexpected error during message processing: {e}")
-                            break
-                
-                except KeyboardInterrupt:
-                    logger.info("Received interrupt signal")
-                    self.should_stop = True
-                    break
-                
-            except pika.exceptions.AMQPConnectionError as e:
-                logger.error(f"AMQP connection error: {e}")
-                time.sleep(1)  # Brief pause before reconnection attempt
+            except KeyboardInterrupt:
+                logger.info("Received interrupt signal")
+                self.stop_event.set()
+                break
             except Exception as e:
                 logger.error(f"Unexpected error in consume loop: {e}", exc_info=True)
-                time.sleep(1)  # Brief pause before reconnection attempt
+            
+            if self.stop_event.is_set():
+                break
+            
+            if self.consuming:
+                # We were connected and lost the connection - reconnect straight away
+                logger.info("RabbitMQ connection lost, attempting to reconnect...")
+                retry_count = 0
+                self.consuming = False
+                self.stop_event.wait(1)  # Brief pause before reconnection attempt
+            else:
+                retry_count += 1
+                self.wait_before_reconnect(retry_count)
         
         logger.info("Message consumption stopped")
     
@@ -831,15 +1285,18 @@ class MT5Service:
         """Main service loop with automatic reconnection"""
         logger.info("Starting MT5 Service v7 (Auto-Reconnect Edition)...")
         logger.info(f"VPS Instance ID: {self.vps_id}")
-        logger.info(f"Queue Name: {os.getenv('RABBITMQ_QUEUE_NAME', 'not set')}")
+        logger.info(f"Queue Name: {self.queue_name}")
         logger.info(f"Trading Mode Configuration:")
-        logger.info(f"  - Single Trade Mode: {'ENABLED' if Config.SINGLE_TRADE_MODE else 'DISABLED'}")
-        logger.info(f"  - Close Opposite Positions: {'ENABLED' if Config.CLOSE_OPPOSITE_POSITIONS else 'DISABLED'}")
+        logger.info(f"  - Single Trade Mode: {'ENABLED' if CONFIG.SINGLE_TRADE_MODE else 'DISABLED'}")
+        logger.info(f"  - Close Opposite Positions: {'ENABLED' if CONFIG.CLOSE_OPPOSITE_POSITIONS else 'DISABLED'}")
+        logger.info(f"  - Max signal age: {CONFIG.SIGNAL_MAX_AGE} seconds")
         logger.info(f"Security: Token-based queue isolation ENABLED")
         logger.info(f"RabbitMQ Configuration:")
-        logger.info(f"  - Heartbeat: {Config.RABBITMQ_HEARTBEAT} seconds")
-        logger.info(f"  - Connection timeout: {Config.RABBITMQ_BLOCKED_CONNECTION_TIMEOUT} seconds")
-        logger.info(f"  - Max retry delay: {Config.RABBITMQ_MAX_RETRY_DELAY} seconds")
+        logger.info(f"  - Heartbeat: {CONFIG.RABBITMQ_HEARTBEAT} seconds")
+        logger.info(f"  - Prefetch: {CONFIG.RABBITMQ_PREFETCH} messages")
+        logger.info(f"  - Signal workers: {CONFIG.MT5_WORKERS}")
+        logger.info(f"  - Connection timeout: {CONFIG.RABBITMQ_BLOCKED_CONNECTION_TIMEOUT} seconds")
+        logger.info(f"  - Max retry delay: {CONFIG.RABBITMQ_MAX_RETRY_DELAY} seconds")
         
         # Connect to MT5 (but continue if it fails)
         if not self.connect_mt5():
@@ -851,6 +1308,25 @@ class MT5Service:
         if not self.connect_redis():
             logger.warning("Failed to connect to Redis - continuing without Redis logging")
             self.redis_client = None
+            self.redis_log = None
+        
+        # Signals are executed on worker threads so the RabbitMQ IO loop never blocks on MT5
+        for number in range(1, CONFIG.MT5_WORKERS + 1):
+            worker = threading.Thread(target=self.signal_worker_loop, name=f'SignalWorker-{number}', daemon=True)
+            worker.start()
+            self.signal_workers.append(worker)
+        
+        # Trade records and trade log lines are written in batches, off the signal path
+        try:
+            self.trade_log_fd = os.open(
+                os.path.join(log_dir, "trade_attempts.log"),
+                os.O_WRONLY | os.O_APPEND | os.O_CREAT | getattr(os, 'O_BINARY', 0),  # O_BINARY: Windows only
+                0o644
+            )
+        except OSError as e:
+            logger.warning(f"Cannot open trade log - trade attempts will not be logged to file: {e}")
+        self.flusher = threading.Thread(target=self.flusher_loop, name='Flusher', daemon=True)
+        self.flusher.start()
         
         logger.info("Service started. Ready to process trading signals!")
         
@@ -867,22 +1343,59 @@ class MT5Service:
     def shutdown(self):
         """Gracefully shutdown the service"""
         logger.info("Shutting down MT5 Service...")
-        self.should_stop = True
+        self.stop_event.set()
+        
+        # Discard prefetched signals that have not started - they were never acked, so the
+        # broker requeues them when the channel closes instead of them trading during shutdown
+        discarded = 0
+        while True:
+            try:
+                self.signal_queue.get_nowait()
+            except queue.Empty:
+                break
+            discarded += 1
+        if discarded:
+            logger.info(f"Left {discarded} queued signal(s) unexecuted for redelivery")
+        
+        # Wait for signals already in order_send - no timeout, since closing the channel
+        # or MT5 under a running order would leave it executed but unacked
+        for _ in self.signal_workers:
+            self.signal_queue.put(None)
+        for worker in self.signal_workers:
+            worker.join()
         
         # Close RabbitMQ connection
         try:
-            if self.rabbitmq_channel:
-                self.rabbitmq_channel.stop_consuming()
-            if self.rabbitmq_connection and not self.rabbitmq_connection.is_closed:
-                self.rabbitmq_connection.close()
-                logger.info("RabbitMQ connection closed")
+            if self.rabbitmq_connection and self.rabbitmq_connection.is_open:
+                # Queued behind any pending acks so they are sent first; the IO loop
+                # then runs until the close handshake completes
+                self.rabbitmq_connection.ioloop.add_callback_threadsafe(self.flush_acks)
+                self.rabbitmq_connection.ioloop.add_callback_threadsafe(self.rabbitmq_connection.close)
+                self.rabbitmq_connection.ioloop.start()
         except Exception as e:
             logger.warning(f"Error closing RabbitMQ connection: {e}")
         
+        # Write whatever the worker left in the buffers
+        if self.flusher and self.flusher.is_alive():
+            self.flush_event.set()
+            self.flusher.join(timeout=10)
+        if self.trade_log_fd is not None:
+            self.flush_trade_log()
+            os.close(self.trade_log_fd)
+        
         # Close Redis connection
         try:
+            if self.redis_log:
+                if not self.flush_redis_buffer():
+                    logger.warning(f"Redis unreachable at shutdown - {len(self.redis_buffer)} record(s) not stored")
+                self.redis_log.close()
             if self.redis_client:
                 self.redis_client.close()
+            # Clients built on a shared pool leave its sockets open on close()
+            for pool in (self.redis_pool, self.redis_log_pool):
+                if pool:
+                    pool.disconnect()
+            if self.redis_pool:
                 logger.info("Redis connection closed")
         except Exception as e:
             logger.warning(f"Error closing Redis connection: {e}")
@@ -214,7 +214,7 @@ try {
         Write-Log "Dependencies installed from requirements.txt"
     } else {
         Write-Log "No requirements.txt found, installing packages manually..."
-        $packages = "MetaTrader5", "redis", "pika", "python-dotenv"
+        $packages = "MetaTrader5", "redis", "pika", "python-dotenv", "orjson"
         foreach ($package in $packages) {
             Write-Log "Installing $package..."
             & python -m pip install $package 2>&1 | Out-Null
@@ -261,6 +261,10 @@ REDIS_PASSWORD=$redisPassword
     $envContent | Out-File -FilePath $envPath -Encoding UTF8
     Write-Log "Environment configuration created at: $envPath"
     
+    # Precompile .env so service starts skip re-parsing it
+    $compileOutput = & python "C:\NightTrader\service\mt5-service\compile_env.py" 2>&1
+    Write-Log "Environment cache: $compileOutput"
+    
     if (-not $rabbitmqPassword -or -not $redisPassword) {
         Write-Log "WARNING: RABBITMQ_PASSWORD and REDIS_PASSWORD must be set in the .env file before starting the service!"
     }
@@ -219,7 +219,7 @@ Subsystem sftp sftp-server.exe
         & python -m pip install -r requirements.txt 2>&1 | Out-String | Write-Log
     } else {
         # Install manually if requirements.txt doesn't exist
-        & python -m pip install MetaTrader5 redis pika python-dotenv 2>&1 | Out-String | Write-Log
+        & python -m pip install MetaTrader5 redis pika python-dotenv orjson 2>&1 | Out-String | Write-Log
     }
     
     Write-Log "Python dependencies installed"
@@ -261,6 +261,9 @@ REDIS_PASSWORD=$redisPassword
     $envContent | Out-File -FilePath $envPath -Encoding UTF8
     Write-Log "Environment configured with secure credentials"
     
+    # Precompile .env so service starts skip re-parsing it
+    & python compile_env.py 2>&1 | Out-String | Write-Log
+    
     # ============ STAGE 4: Service Launch with Session Management ============
     Write-Log ""
     Write-Log "STAGE 4: Starting Service with Session Management"
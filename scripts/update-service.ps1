@@ -24,7 +24,13 @@ if ($LASTEXITCODE -ne 0) {
 
 Write-Host "[2/5] Installing/updating Python dependencies..." -ForegroundColor Yellow
 python -m pip install --upgrade pip
-pip install --upgrade pika redis python-dotenv MetaTrader5
+pip install --upgrade pika redis python-dotenv MetaTrader5 orjson
+
+# Refresh the precompiled .env cache (stale caches are ignored by config.py)
+$envFile = Join-Path $servicePath "mt5-service\.env"
+if (Test-Path $envFile) {
+    python (Join-Path $servicePath "mt5-service\compile_env.py")
+}
 
 Write-Host "`n[3/5] Stopping existing MT5 service..." -ForegroundColor Yellow
 # Try to stop the Python process gracefully
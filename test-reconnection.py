@@ -4,108 +4,208 @@ Test script to verify RabbitMQ reconnection mechanism
 Run this to simulate connection failures and verify automatic recovery
 """
 
+import argparse
+import asyncio
 import pika
+from pika.adapters.asyncio_connection import AsyncioConnection
 import time
 import json
 import os
-from datetime import datetime
+import socket
+from datetime import datetime, timezone
 from dotenv import load_dotenv
 
 load_dotenv()
 
-def send_test_signal():
-    """Send a test signal to the queue"""
-    digitalocean_ip = os.getenv('DIGITALOCEAN_IP', '138.197.3.109')
-    rabbitmq_user = os.getenv('RABBITMQ_USER', 'nighttrader')
-    rabbitmq_password = os.getenv('RABBITMQ_PASSWORD')
-    queue_name = os.getenv('RABBITMQ_QUEUE_NAME', 'mt5_signals')
-    vps_id = os.getenv('VPS_INSTANCE_ID', 'test-vps')
-    
-    if not rabbitmq_password:
-        print("ERROR: RABBITMQ_PASSWORD not set in environment")
-        return False
+DIGITALOCEAN_IP = os.getenv('DIGITALOCEAN_IP', '138.197.3.109')
+RABBITMQ_USER = os.getenv('RABBITMQ_USER', 'nighttrader')
+RABBITMQ_PASSWORD = os.getenv('RABBITMQ_PASSWORD')
+QUEUE_NAME = os.getenv('RABBITMQ_QUEUE_NAME', 'mt5_signals')
+VPS_ID = os.getenv('VPS_INSTANCE_ID', 'test-vps')
+
+# pika sets TCP_NODELAY on every socket itself and only understands keepalive/timeout
+# keys here. Options this platform lacks (TCP_USER_TIMEOUT on Windows) are left out
+# instead of being ignored with a warning.
+TCP_OPTIONS = {
+    name: value for name, value in (
+        ('TCP_KEEPIDLE', 120),
+        ('TCP_KEEPINTVL', 30),
+        ('TCP_KEEPCNT', 10),
+        ('TCP_USER_TIMEOUT', 300000),
+    ) if hasattr(socket, name)
+}
+
+# Built once and shared by both tests, which also share one connection
+CONNECTION_PARAMS = pika.ConnectionParameters(
+    host=DIGITALOCEAN_IP,
+    port=5672,
+    credentials=pika.PlainCredentials(RABBITMQ_USER, RABBITMQ_PASSWORD or ''),
+    heartbeat=60,
+    blocked_connection_timeout=300,
+    socket_timeout=10,
+    connection_attempts=3,
+    retry_delay=5,
+    tcp_options=TCP_OPTIONS
+)
+
+# Static part of the test signal, serialized once; only the timestamps change per publish
+SIGNAL_TEMPLATE = (
+    '{"id": "test-%%s", "vps_id": %s, "action": "BUY", "symbol": "EURUSD", "quantity": 0.01, '
+    '"timestamp": "%%s", "ts_ns": %%d, "test": true, "comment": "Reconnection test signal"}'
+    % json.dumps(VPS_ID)
+).encode()
+
+SIGNAL_PROPERTIES = pika.BasicProperties(
+    delivery_mode=2,  # Persistent
+    expiration='5000'  # 5 second TTL
+)
+
+def build_test_signal():
+    """Return the JSON body of a fresh test signal"""
+    now = datetime.now(timezone.utc).isoformat().encode()  # Aware, so the consumer never guesses the zone
+    # ts_ns is epoch nanoseconds for the consumer's stale check
+    return SIGNAL_TEMPLATE % (now, now, time.time_ns())
+
+def send_test_signal(connection, count=1, interval=0):
+    """Send count test signals to the queue over an open connection
     
+    The connection stays open between signals; waiting interval seconds through
+    process_data_events keeps its heartbeat serviced like the long-lived consumer's.
+    """
     try:
-        # Connect to RabbitMQ
-        credentials = pika.PlainCredentials(rabbitmq_user, rabbitmq_password)
-        connection = pika.BlockingConnection(
-            pika.ConnectionParameters(
-                host=digitalocean_ip,
-                port=5672,
-                credentials=credentials
-            )
-        )
+        # A channel on the existing connection is one frame, not a new handshake
         channel = connection.channel()
         
-        # Create test signal
-        test_signal = {
-            "id": f"test-{datetime.now().isoformat()}",
-            "vps_id": vps_id,
-            "action": "BUY",
-            "symbol": "EURUSD",
-            "quantity": 0.01,
-            "timestamp": datetime.now().isoformat(),
-            "test": True,
-            "comment": "Reconnection test signal"
-        }
+        # Check the queue exists without creating it or touching its arguments
+        try:
+            channel.queue_declare(queue=QUEUE_NAME, passive=True)
+        except pika.exceptions.ChannelClosedByBroker as e:
+            print(f"✗ Queue '{QUEUE_NAME}' not found on the broker: {e.reply_text}")
+            return False
         
-        # Send signal
-        channel.basic_publish(
-            exchange='',
-            routing_key=queue_name,
-            body=json.dumps(test_signal),
-            properties=pika.BasicProperties(
-                delivery_mode=2,  # Persistent
-                expiration='5000'  # 5 second TTL
-            )
-        )
+        # With confirms, basic_publish returns only after the broker has accepted the message
+        channel.confirm_delivery()
         
-        print(f"✓ Test signal sent to queue '{queue_name}'")
-        print(f"  Signal: {test_signal}")
+        for sent in range(1, count + 1):
+            if sent > 1:
+                connection.process_data_events(time_limit=interval)
+            
+            body = build_test_signal()
+            
+            # Send signal - mandatory makes an unroutable message an error instead of a silent drop
+            channel.basic_publish(
+                exchange='',
+                routing_key=QUEUE_NAME,
+                body=body,
+                properties=SIGNAL_PROPERTIES,
+                mandatory=True
+            )
+            
+            print(f"✓ Test signal {sent}/{count} sent to queue '{QUEUE_NAME}'")
+            print(f"  Signal: {body.decode()}")
         
-        connection.close()
+        channel.close()
         return True
         
+    except pika.exceptions.UnroutableError:
+        print(f"✗ Test signal was not routed - queue '{QUEUE_NAME}' does not exist")
+        return False
+    except pika.exceptions.NackError:
+        print("✗ Broker rejected the test signal (nack)")
+        return False
     except Exception as e:
         print(f"✗ Failed to send test signal: {e}")
         return False
 
-def test_connection_params():
-    """Test enhanced connection parameters"""
-    digitalocean_ip = os.getenv('DIGITALOCEAN_IP', '138.197.3.109')
-    rabbitmq_user = os.getenv('RABBITMQ_USER', 'vps_consumer')
-    rabbitmq_password = os.getenv('RABBITMQ_PASSWORD')
+def send_test_signals(n, timeout=30):
+    """Publish n test signals at once over an async connection and count the confirms
+    
+    Publishes are pipelined, so many are in flight before the first confirm arrives.
+    Returns a dict with published/acked/nacked/returned counts, or None if the connection failed.
+    """
+    loop = asyncio.new_event_loop()
+    counts = {'published': 0, 'acked': 0, 'nacked': 0, 'returned': 0}
+    pending = set()
+    started = time.monotonic()
+    
+    def on_connection_open(connection):
+        connection.channel(on_open_callback=on_channel_open)
+    
+    def on_connection_failed(connection, error):
+        print(f"✗ Async connection failed: {error!r}")
+        loop.stop()
+    
+    def on_connection_closed(connection, reason):
+        loop.stop()
+    
+    def on_channel_open(channel):
+        channel.add_on_return_callback(on_returned)
+        channel.confirm_delivery(ack_nack_callback=on_confirm, callback=lambda frame: publish_all(channel))
     
-    if not rabbitmq_password:
+    def publish_all(channel):
+        for tag in range(1, n + 1):
+            channel.basic_publish('', QUEUE_NAME, build_test_signal(), SIGNAL_PROPERTIES, mandatory=True)
+            pending.add(tag)  # Delivery tags count up from 1 once confirms are enabled
+            counts['published'] += 1
+    
+    def on_returned(channel, method, properties, body):
+        counts['returned'] += 1
+    
+    def on_confirm(frame):
+        method = frame.method
+        # One multiple=True confirm covers every outstanding tag up to delivery_tag
+        if method.multiple:
+            tags = {tag for tag in pending if tag <= method.delivery_tag}
+        else:
+            tags = {method.delivery_tag} & pending
+        pending.difference_update(tags)
+        if isinstance(method, pika.spec.Basic.Ack):
+            counts['acked'] += len(tags)
+        else:
+            counts['nacked'] += len(tags)
+        if not pending:
+            connection.close()
+    
+    def on_timeout():
+        if connection.is_open:
+            print(f"✗ Timed out after {timeout}s with {len(pending)} unconfirmed signal(s)")
+            connection.close()
+    
+    connection = AsyncioConnection(
+        CONNECTION_PARAMS,
+        on_open_callback=on_connection_open,
+        on_open_error_callback=on_connection_failed,
+        on_close_callback=on_connection_closed,
+        custom_ioloop=loop
+    )
+    loop.call_later(timeout, on_timeout)
+    try:
+        loop.run_forever()
+    finally:
+        loop.close()
+    
+    if not counts['published']:
+        return None  # Never got as far as publishing
+    elapsed = time.monotonic() - started
+    print(f"  {n} signal(s) in {elapsed:.2f}s: {counts['acked']} acked, "
+          f"{counts['nacked']} nacked, {counts['returned']} returned")
+    return counts
+
+def test_connection_params():
+    """Test enhanced connection parameters; returns the open connection or None"""
+    if not RABBITMQ_PASSWORD:
         print("ERROR: RABBITMQ_PASSWORD not set in environment")
-        return False
+        return None
     
     print(f"\nTesting RabbitMQ connection with enhanced parameters...")
-    print(f"  Host: {digitalocean_ip}")
-    print(f"  User: {rabbitmq_user}")
+    print(f"  Host: {DIGITALOCEAN_IP}")
+    print(f"  User: {RABBITMQ_USER}")
     print(f"  Heartbeat: 60 seconds")
     print(f"  Socket timeout: 10 seconds")
+    print(f"  TCP options: {', '.join(TCP_OPTIONS) or 'none supported'}")
     
     try:
-        # Test connection with enhanced parameters
-        connection_params = pika.ConnectionParameters(
-            host=digitalocean_ip,
-            port=5672,
-            credentials=pika.PlainCredentials(rabbitmq_user, rabbitmq_password),
-            heartbeat=60,
-            blocked_connection_timeout=300,
-            socket_timeout=10,
-            connection_attempts=3,
-            retry_delay=5,
-            tcp_options={
-                'TCP_KEEPIDLE': 120,
-                'TCP_KEEPINTVL': 30,
-                'TCP_KEEPCNT': 10,
-                'TCP_USER_TIMEOUT': 300000
-            }
-        )
-        
-        connection = pika.BlockingConnection(connection_params)
+        connection = pika.BlockingConnection(CONNECTION_PARAMS)
         
         print("✓ Connection successful with enhanced parameters")
         print(f"✓ Connection state: {'Open' if not connection.is_closed else 'Closed'}")
@@ -115,30 +215,37 @@ def test_connection_params():
         time.sleep(5)
         connection.process_data_events(time_limit=0)
         print("✓ Heartbeat working correctly")
-        
-        connection.close()
-        print("✓ Connection closed cleanly")
-        return True
+        return connection
         
     except Exception as e:
         print(f"✗ Connection test failed: {e}")
-        return False
+        return None
 
 def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--count', type=int, default=1,
+                        help="Number of test signals to send over the shared connection")
+    parser.add_argument('--interval', type=float, default=0,
+                        help="Seconds to wait between test signals (heartbeats keep running)")
+    parser.add_argument('--burst', type=int, default=0,
+                        help="Also publish this many signals at once over an async connection")
+    args = parser.parse_args()
+    
     print("=" * 60)
     print("RabbitMQ Reconnection Mechanism Test")
     print("=" * 60)
     
     # Test 1: Connection parameters
-    if test_connection_params():
+    connection = test_connection_params()
+    if connection:
         print("\n✓ Connection parameter test PASSED")
     else:
         print("\n✗ Connection parameter test FAILED")
     
-    # Test 2: Send test signal
+    # Test 2: Send test signal over the same connection
     print("\n" + "-" * 60)
-    print("Sending test signal...")
-    if send_test_signal():
+    print(f"Sending {args.count} test signal(s)...")
+    if connection and send_test_signal(connection, args.count, args.interval):
         print("\n✓ Test signal sent successfully")
         print("\nNow check the MT5 service logs to verify:")
         print("1. The signal was received")
@@ -147,6 +254,21 @@ def main():
     else:
         print("\n✗ Failed to send test signal")
     
+    if connection and connection.is_open:
+        connection.close()
+        print("✓ Connection closed cleanly")
+    
+    # Test 3: Pipelined burst with publisher confirms
+    if args.burst > 0 and RABBITMQ_PASSWORD:
+        print("\n" + "-" * 60)
+        print(f"Publishing a burst of {args.burst} signals...")
+        counts = send_test_signals(args.burst)
+        # Unroutable messages are returned but still acked, so both must line up
+        if counts and counts['acked'] == args.burst and not counts['returned']:
+            print("\n✓ Burst publish test PASSED")
+        else:
+            print("\n✗ Burst publish test FAILED")
+    
     print("\n" + "=" * 60)
     print("Testing complete!")
     print("\nTo test reconnection:")
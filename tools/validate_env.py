@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""
+Check that the .env template declares every setting Config.validate() requires.
+
+Run by pre-commit whenever config.py or .env.example changes, so the
+required keys are enforced at commit time rather than on every service
+start (set NT_SKIP_VALIDATE=1 on the VPS to skip the runtime check).
+"""
+
+import os
+import sys
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TEMPLATE_PATH = os.path.join(REPO_ROOT, 'mt5-service', '.env.example')
+
+REQUIRED_KEYS = (
+    'MT5_LOGIN',
+    'MT5_PASSWORD',
+    'MT5_SERVER',
+    'DO_SERVER_IP',
+    'RABBITMQ_PASSWORD',
+    'REDIS_PASSWORD',
+)
+
+
+def template_keys(path):
+    """Return the keys declared in a .env style file"""
+    keys = set()
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith('#') or '=' not in line:
+                continue
+            key = line.split('=', 1)[0].strip()
+            if key.startswith('export '):
+                key = key[len('export '):].strip()
+            keys.add(key)
+    return keys
+
+
+def main():
+    if not os.path.exists(TEMPLATE_PATH):
+        print(f"ERROR: {TEMPLATE_PATH} not found")
+        return 1
+
+    missing = [key for key in REQUIRED_KEYS if key not in template_keys(TEMPLATE_PATH)]
+    if missing:
+        print(f"ERROR: {TEMPLATE_PATH} is missing required keys: {', '.join(missing)}")
+        return 1
+
+    print(f"✓ {TEMPLATE_PATH} declares all required keys")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())